@@ -0,0 +1,166 @@
+# =============================================================================
+# FILE: connection_filters.py
+# PURPOSE: Compiled, mask-caching filters over an accepted-connections frame
+# =============================================================================
+
+import re
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def parse_keywords(text):
+    """Comma-separated keywords, stripped and lowercased, empty entries dropped"""
+    return tuple(k.strip().lower() for k in (text or '').split(',') if k.strip())
+
+
+class KeywordIndex:
+    """Inverted token index over the distinct values of a lowercased text column
+
+    Postings map each \\w+ token to the distinct values that contain it, and rows
+    point at their value through factorized codes, so a lookup touches the
+    vocabulary and the distinct values, never the rows. Matching keeps the
+    substring semantics of str.contains: partial tokens ('sales' in 'salesforce')
+    are found by scanning the vocabulary, and keywords spanning several tokens
+    ('head of') are verified by substring only on the values whose tokens could
+    contain them.
+    """
+
+    def __init__(self, text):
+        self.codes, values = pd.factorize(text)
+        self.values = values.to_numpy(dtype=object)
+        postings = defaultdict(list)
+        for value_id, value in enumerate(self.values):
+            for token in set(TOKEN_PATTERN.findall(value)):
+                postings[token].append(value_id)
+        self.postings = {token: np.array(ids) for token, ids in postings.items()}
+        self._keyword_ids = {}
+
+    def _token_ids(self, fragment, bounded_left, bounded_right):
+        """Distinct values with a token that could hold fragment at that position
+
+        A fragment with a non-word character on both sides must be a whole token;
+        one bounded on a single side must start or end a token; otherwise it may
+        sit anywhere inside one (a partial token, found by scanning the vocabulary).
+        """
+        if bounded_left and bounded_right:
+            matching = [self.postings.get(fragment, np.array([], dtype=int))]
+        elif bounded_left:
+            matching = [ids for token, ids in self.postings.items() if token.startswith(fragment)]
+        elif bounded_right:
+            matching = [ids for token, ids in self.postings.items() if token.endswith(fragment)]
+        else:
+            matching = [ids for token, ids in self.postings.items() if fragment in token]
+        return np.unique(np.concatenate(matching)) if matching else np.array([], dtype=int)
+
+    def keyword_ids(self, keyword):
+        """Distinct values containing keyword as a substring (cached per keyword)"""
+        ids = self._keyword_ids.get(keyword)
+        if ids is not None:
+            return ids
+        fragments = [(m.group(), m.start() > 0, m.end() < len(keyword)) for m in TOKEN_PATTERN.finditer(keyword)]
+        if not fragments:
+            # Punctuation only - nothing to look up, scan the distinct values
+            candidates = np.arange(len(self.values))
+        else:
+            # Smallest posting set first keeps the intersections cheap
+            postings = sorted((self._token_ids(*fragment) for fragment in fragments), key=len)
+            candidates = postings[0]
+            for ids in postings[1:]:
+                candidates = np.intersect1d(candidates, ids, assume_unique=True)
+        if len(fragments) != 1 or fragments[0][0] != keyword:
+            found = pd.Series(self.values[candidates], dtype=object).str.contains(keyword, regex=False)
+            candidates = candidates[found.to_numpy(dtype=bool)]
+        self._keyword_ids[keyword] = candidates
+        return candidates
+
+    def mask(self, keywords):
+        """Row mask: the value contains any of the keywords"""
+        hit = np.zeros(len(self.values) + 1, dtype=bool)  # last slot: rows without a value
+        for keyword in keywords:
+            hit[self.keyword_ids(keyword)] = True
+        return hit[self.codes]
+
+
+class ConnectionFilter:
+    """Filters for one accepted-connections frame
+
+    Column work happens once per frame: dates are reduced to datetime64[D], Title
+    and Organization get a KeywordIndex, categories are made categorical. Each
+    predicate keeps the mask for its last arguments, so a rerun re-evaluates only
+    the predicates whose widget changed, and the active masks are combined in a
+    single step.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.categories = df['Category'].astype('category')
+        self.titles = KeywordIndex(df['Title'].fillna('').astype(str).str.lower())
+        self.organizations = KeywordIndex(df['Organization'].fillna('').astype(str).str.lower())
+        self.followers = pd.to_numeric(df['Followers'], errors='coerce').to_numpy(dtype=float)
+        self.invited_days = pd.to_datetime(df['Invited On']).to_numpy(dtype='datetime64[D]')
+        self.connected_days = pd.to_datetime(df['Connected On (Approx)']).to_numpy(dtype='datetime64[D]')
+        self._masks = {}  # predicate -> (arguments, mask)
+
+    def _mask(self, predicate, arguments, compute):
+        cached = self._masks.get(predicate)
+        if cached is not None and cached[0] == arguments:
+            return cached[1]
+        mask = compute()
+        self._masks[predicate] = (arguments, mask)
+        return mask
+
+    def category_mask(self, categories):
+        categories = tuple(sorted(categories))
+        return self._mask('category', categories,
+                          lambda: self.categories.isin(categories).to_numpy())
+
+    def title_include_mask(self, keywords):
+        return self._mask('title_include', keywords, lambda: self.titles.mask(keywords))
+
+    def title_exclude_mask(self, keywords):
+        return self._mask('title_exclude', keywords, lambda: ~self.titles.mask(keywords))
+
+    def organization_mask(self, text):
+        return self._mask('organization', text,
+                          lambda: self.organizations.mask((text,)))
+
+    def follower_mask(self, min_followers, max_followers):
+        def compute():
+            # NaN follower counts never pass, as with the old chained comparisons
+            mask = self.followers >= min_followers
+            if max_followers:  # 0 = no upper limit
+                mask &= self.followers <= max_followers
+            return mask
+        return self._mask('followers', (min_followers, max_followers), compute)
+
+    def _date_mask(self, predicate, days, start, end):
+        start, end = np.datetime64(start, 'D'), np.datetime64(end, 'D')
+        return self._mask(predicate, (start, end), lambda: (days >= start) & (days <= end))
+
+    def apply(self, categories=None, title_include='', title_exclude='', organization='',
+              min_followers=0, max_followers=0, invited_range=None, connected_range=None):
+        """Rows passing every active filter, as a new frame (boolean indexing always copies)
+
+        categories=None means every category; an empty list matches no rows.
+        """
+        masks = [self.follower_mask(min_followers, max_followers)]
+        if categories is not None:
+            masks.append(self.category_mask(categories))
+        include = parse_keywords(title_include)
+        if include:
+            masks.append(self.title_include_mask(include))
+        exclude = parse_keywords(title_exclude)
+        if exclude:
+            masks.append(self.title_exclude_mask(exclude))
+        organization = (organization or '').strip().lower()
+        if organization:
+            masks.append(self.organization_mask(organization))
+        if invited_range:
+            masks.append(self._date_mask('invited', self.invited_days, *invited_range))
+        if connected_range:
+            masks.append(self._date_mask('connected', self.connected_days, *connected_range))
+        return self.df[np.logical_and.reduce(masks)]
@@ -0,0 +1,304 @@
+# =============================================================================
+# FILE: data_access.py
+# PURPOSE: Shared data-access layer - pooled Azure SQL connections for all pages
+# =============================================================================
+
+import re
+import threading
+import time
+from collections import deque
+
+import pymssql
+import streamlit as st
+
+# Pool tuning. A dozen operators rarely need more than a handful of live
+# connections at once; anything above MAX_POOL_SIZE waits for a free one.
+MAX_POOL_SIZE = 10
+CHECKOUT_TIMEOUT = 30       # seconds to wait for a free connection
+HEALTH_CHECK_AFTER = 60     # idle seconds before a connection is pinged on checkout
+MAX_IDLE_TIME = 600         # idle seconds before a connection is recycled
+MAX_LIFETIME = 3600         # seconds before any connection is recycled
+
+
+def parse_conn_str(conn_str):
+    """Parse Server/Database/UID/PWD out of an ADO-style connection string"""
+    def _get(key):
+        match = re.search(rf'{key}=([^;]+)', conn_str)
+        return match.group(1) if match else None
+
+    return {
+        "server": _get("Server"),
+        "database": _get("Database"),
+        "user": _get("UID"),
+        "password": _get("PWD"),
+    }
+
+
+class PooledConnection:
+    """Wrapper around a pymssql connection; close() hands it back to the pool"""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self._released = False
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._pool.release(self._conn)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __del__(self):
+        # Safety net for call sites that raise before reaching close()
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of pymssql connections"""
+
+    def __init__(self, connect_kwargs, max_size=MAX_POOL_SIZE, checkout_timeout=CHECKOUT_TIMEOUT,
+                 health_check_after=HEALTH_CHECK_AFTER, max_idle_time=MAX_IDLE_TIME,
+                 max_lifetime=MAX_LIFETIME):
+        self.connect_kwargs = connect_kwargs
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.health_check_after = health_check_after
+        self.max_idle_time = max_idle_time
+        self.max_lifetime = max_lifetime
+
+        self._lock = threading.Condition()
+        self._idle = deque()        # (conn, created_at, last_used)
+        self._created_at = {}       # id(conn) -> created_at, for every open connection
+        self._in_use = 0
+        self._stats = {
+            "checkouts": 0,
+            "connections_opened": 0,
+            "connections_recycled": 0,
+            "health_check_failures": 0,
+            "waits": 0,
+            "timeouts": 0,
+        }
+
+    def _open(self):
+        return pymssql.connect(timeout=30, login_timeout=60, **self.connect_kwargs)
+
+    def _forget(self, conn):
+        """Free a recycled connection's slot (lock must be held; close it after releasing)"""
+        self._created_at.pop(id(conn), None)
+        self._stats["connections_recycled"] += 1
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_healthy(conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            return True
+        except Exception:
+            return False
+
+    def _take_idle(self):
+        """Pop idle connections until a usable one is found (lock must be held)
+
+        The lock is released while a candidate is pinged or closed, so a half-open
+        connection stuck on the ping never stalls other checkouts and returns. The
+        popped candidate keeps its slot until it is forgotten.
+        """
+        while self._idle:
+            conn, created_at, last_used = self._idle.pop()
+            now = time.monotonic()
+            expired = now - created_at > self.max_lifetime or now - last_used > self.max_idle_time
+            if not expired and now - last_used <= self.health_check_after:
+                return conn
+            self._lock.release()
+            try:
+                healthy = not expired and self._is_healthy(conn)
+                if not healthy:
+                    self._close_quietly(conn)
+            finally:
+                self._lock.acquire()
+            if healthy:
+                return conn
+            if not expired:
+                self._stats["health_check_failures"] += 1
+            self._forget(conn)
+        return None
+
+    def acquire(self):
+        """Check out a connection, opening a new one if the pool has room"""
+        deadline = time.monotonic() + self.checkout_timeout
+        with self._lock:
+            while True:
+                conn = self._take_idle()
+                if conn is not None:
+                    break
+                if len(self._created_at) < self.max_size:
+                    # Reserve the slot before the (slow) login so other threads see it
+                    placeholder = object()
+                    self._created_at[id(placeholder)] = time.monotonic()
+                    self._lock.release()
+                    try:
+                        conn = self._open()
+                    except Exception:
+                        self._lock.acquire()
+                        self._created_at.pop(id(placeholder), None)
+                        self._lock.notify()
+                        raise
+                    self._lock.acquire()
+                    self._created_at[id(conn)] = self._created_at.pop(id(placeholder))
+                    self._stats["connections_opened"] += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise TimeoutError(
+                        f"No database connection available after {self.checkout_timeout}s "
+                        f"({self.max_size} in use)"
+                    )
+                self._stats["waits"] += 1
+                self._lock.wait(remaining)
+
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+            return PooledConnection(self, conn)
+
+    def release(self, conn):
+        """Return a connection to the pool, dropping any uncommitted work"""
+        try:
+            conn.rollback()
+            healthy = True
+        except Exception:
+            healthy = False
+
+        with self._lock:
+            self._in_use -= 1
+            created_at = self._created_at.get(id(conn))
+            keep = healthy and created_at is not None and time.monotonic() - created_at <= self.max_lifetime
+            if keep:
+                self._idle.append((conn, created_at, time.monotonic()))
+            else:
+                self._forget(conn)
+            self._lock.notify()
+        if not keep:
+            self._close_quietly(conn)
+
+    def close_all(self):
+        """Close every idle connection (in-use ones are closed on release)"""
+        with self._lock:
+            closing = [conn for conn, _, _ in self._idle]
+            self._idle.clear()
+            for conn in closing:
+                self._forget(conn)
+        for conn in closing:
+            self._close_quietly(conn)
+
+    def stats(self):
+        """Snapshot of pool size and lifetime counters"""
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "open": len(self._created_at),
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                **self._stats,
+            }
+
+
+@st.cache_resource
+def get_pool():
+    """Process-wide connection pool, shared across reruns, sessions and pages"""
+    config = parse_conn_str(st.secrets["conn_str"])
+    return ConnectionPool(config)
+
+
+def get_db_connection():
+    """Check out a pooled database connection (call close() to return it)"""
+    try:
+        return get_pool().acquire()
+    except Exception as e:
+        raise Exception(f"Database connection failed: {str(e)}")
+
+
+def get_pool_stats():
+    """Current connection pool statistics"""
+    return get_pool().stats()
+
+
+def describe_pool():
+    """One-line pool summary for the configuration expanders"""
+    s = get_pool_stats()
+    return (
+        f"Connection pool: {s['in_use']} in use, {s['idle']} idle (max {s['max_size']}) - "
+        f"{s['checkouts']:,} checkouts, {s['connections_opened']:,} logins, "
+        f"{s['connections_recycled']:,} recycled"
+    )
+
+
+# --- Batched ingest -----------------------------------------------------------
+
+DEFAULT_BATCH_SIZE = 500
+MAX_ROWS_PER_INSERT = 1000  # SQL Server limit for a single VALUES list
+
+
+def bulk_insert(conn, table, columns, rows, batch_size=DEFAULT_BATCH_SIZE, sql_values=None,
+                progress_callback=None):
+    """Insert rows with multi-row VALUES statements, one transaction per batch.
+
+    rows is a list of (row_key, values_tuple). sql_values maps extra columns to
+    raw SQL expressions (e.g. {"CreatedAt": "GETDATE()"}) appended to every row.
+    A batch that fails is rolled back and retried row by row, so bad rows are
+    reported individually while the rest of the batch is still inserted.
+    Returns (inserted_count, errors) where errors is a list of (row_key, exception).
+    """
+    sql_values = sql_values or {}
+    batch_size = max(1, min(int(batch_size), MAX_ROWS_PER_INSERT))
+    all_columns = list(columns) + list(sql_values.keys())
+    row_sql = "(" + ", ".join(["%s"] * len(columns) + list(sql_values.values())) + ")"
+    insert_prefix = f"INSERT INTO {table} ({', '.join(all_columns)}) VALUES "
+
+    cursor = conn.cursor()
+    inserted_count = 0
+    errors = []
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        try:
+            params = tuple(value for _, values in batch for value in values)
+            cursor.execute(insert_prefix + ", ".join([row_sql] * len(batch)), params)
+            conn.commit()
+            inserted_count += len(batch)
+        except Exception:
+            conn.rollback()
+            # Fallback: isolate the failing rows, keep the good ones
+            for row_key, values in batch:
+                try:
+                    cursor.execute(insert_prefix + row_sql, values)
+                    inserted_count += 1
+                except Exception as row_error:
+                    errors.append((row_key, row_error))
+            conn.commit()
+
+        if progress_callback:
+            progress_callback(min(start + batch_size, len(rows)), len(rows))
+
+    return inserted_count, errors
+
@@ -0,0 +1,118 @@
+# =============================================================================
+# FILE: drive_walker.py
+# PURPOSE: Parallel breadth-first Google Drive folder walker (READ ONLY)
+# =============================================================================
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from googleapiclient.discovery import build
+
+from google_quota import get_google_scheduler
+
+DEFAULT_WALK_WORKERS = 8
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+DEFAULT_FILE_FIELDS = "id,name,webViewLink,modifiedTime"
+
+# Like the sheet readers, each worker thread builds its own Drive service:
+# the httplib2 transport underneath is not thread-safe.
+_thread_services = threading.local()
+
+
+def _get_drive_service(creds):
+    """Per-thread Drive v3 service for these credentials"""
+    service = getattr(_thread_services, 'service', None)
+    if service is None or service[0] is not creds:
+        service = (creds, build('drive', 'v3', credentials=creds, cache_discovery=False))
+        _thread_services.service = service
+    return service[1]
+
+
+def _list_children(creds, folder_id, file_fields, drive_id=None):
+    """Every non-trashed child of a folder, following nextPageToken"""
+    service = _get_drive_service(creds)
+    scheduler = get_google_scheduler()
+    params = {
+        "q": f"'{folder_id}' in parents and trashed=false",
+        "fields": f"nextPageToken,files({file_fields},mimeType)",
+        "orderBy": "name",
+        "pageSize": 1000,
+        "includeItemsFromAllDrives": True,
+        "supportsAllDrives": True,
+    }
+    if drive_id:
+        params.update(corpora="drive", driveId=drive_id)
+
+    children = []
+    page_token = None
+    while True:
+        if page_token:
+            params["pageToken"] = page_token
+        res = scheduler.execute("drive", service.files().list(**params))
+        children.extend(res.get("files", []))
+        page_token = res.get("nextPageToken")
+        if not page_token:
+            return children
+
+
+def walk_drive_folder(creds, folder_id, file_fields=DEFAULT_FILE_FIELDS, max_workers=DEFAULT_WALK_WORKERS):
+    """List every file under a folder, one concurrent breadth-first level at a time
+
+    Returns the getfilelistpy GetFileList shape the list manager already uses
+    (searchedFolder, folderTree {id, names, folders}, fileList [{folderTree, files}],
+    totalNumberOfFolders, totalNumberOfFiles) plus 'timing': one
+    {depth, folders, files, seconds} entry per level. Each folder costs a single
+    paged files.list call that returns both its subfolders and its files.
+    """
+    root = get_google_scheduler().execute("drive", _get_drive_service(creds).files().get(
+        fileId=folder_id, fields="id,name,driveId", supportsAllDrives=True
+    ))
+    drive_id = root.get("driveId")
+
+    folder_tree = {"id": [], "names": [], "folders": []}
+    file_list = []
+    timing = []
+
+    level = [(root["id"], root.get("name"), [root["id"]])]
+    depth = 0
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as executor:
+        while level:
+            started = time.time()
+            listings = executor.map(
+                lambda folder: _list_children(creds, folder[0], file_fields, drive_id), level
+            )
+
+            next_level = []
+            level_files = 0
+            for (folder_id, name, chain), children in zip(level, listings):
+                folder_tree["id"].append(chain)
+                folder_tree["names"].append(name)
+                folder_tree["folders"].append(folder_id)
+
+                files = [child for child in children if child.get("mimeType") != FOLDER_MIME_TYPE]
+                file_list.append({"files": files, "folderTree": chain})
+                level_files += len(files)
+
+                next_level.extend(
+                    (child["id"], child.get("name"), chain + [child["id"]])
+                    for child in children if child.get("mimeType") == FOLDER_MIME_TYPE
+                )
+
+            timing.append({
+                "depth": depth,
+                "folders": len(level),
+                "files": level_files,
+                "seconds": round(time.time() - started, 2),
+            })
+            level = next_level
+            depth += 1
+
+    return {
+        "searchedFolder": root,
+        "folderTree": folder_tree,
+        "fileList": file_list,
+        "totalNumberOfFolders": len(folder_tree["folders"]),
+        "totalNumberOfFiles": sum(len(item["files"]) for item in file_list),
+        "timing": timing,
+    }
@@ -0,0 +1,182 @@
+# =============================================================================
+# FILE: exclusion_cache.py
+# PURPOSE: In-process cache of per-client exclusion sets (connected + invited IDs/names)
+# =============================================================================
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+from data_access import get_db_connection
+from linkedin_ids import LINKEDIN_ID_COLUMN, add_linkedin_ids, has_linkedin_id_column
+
+DEFAULT_MEMORY_BUDGET_MB = 256
+REFRESH_INTERVAL = 60          # seconds between delta refreshes of a cached client
+FULL_REBUILD_INTERVAL = 3600   # seconds before a full rebuild (picks up deletes)
+
+# source -> (table, client column, URL column, name column, watermark column)
+SOURCES = {
+    "connections": ("ProfilesX", "Client", "ProfilePermaLink", "Name", "CreatedAt"),
+    "invited": ("InvitedProfiles", "ClientName", "ProfileURL", "FullName", "CreatedAt"),
+}
+
+
+class ClientExclusions:
+    """Exclusion sets for one client plus the watermarks they were built up to"""
+
+    def __init__(self, client):
+        self.client = client
+        self.ids = {source: set() for source in SOURCES}
+        self.names = {source: set() for source in SOURCES}
+        self.watermarks = {source: None for source in SOURCES}
+        self.built_at = 0.0
+        self.refreshed_at = 0.0
+        self.stale = True
+        self.size_bytes = 0
+
+    def add_rows(self, source, df):
+        """Merge fetched rows into the sets and advance the watermark"""
+        _, _, url_column, name_column, watermark_column = SOURCES[source]
+        if df.empty:
+            return
+        df = add_linkedin_ids(df, url_column)
+        new_ids = set(df['linkedin_id'].dropna()) - self.ids[source]
+        new_names = set(df[name_column].dropna()) - self.names[source]
+        # Copy-on-write so sets already handed to readers never change under them
+        if new_ids:
+            self.ids[source] = self.ids[source] | new_ids
+        if new_names:
+            self.names[source] = self.names[source] | new_names
+        self.size_bytes += sum(sys.getsizeof(value) for value in new_ids | new_names) + 8 * (len(new_ids) + len(new_names))
+
+        latest = df[watermark_column].max()
+        if pd.notna(latest):
+            latest = pd.Timestamp(latest).to_pydatetime()
+            if self.watermarks[source] is None or latest > self.watermarks[source]:
+                self.watermarks[source] = latest
+
+
+class ExclusionCache:
+    """Per-client exclusion sets, built once and refreshed with CreatedAt deltas (LRU-evicted)"""
+
+    def __init__(self, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, refresh_interval=REFRESH_INTERVAL,
+                 full_rebuild_interval=FULL_REBUILD_INTERVAL):
+        self.memory_budget_bytes = memory_budget_mb * 1024 * 1024
+        self.refresh_interval = refresh_interval
+        self.full_rebuild_interval = full_rebuild_interval
+        self._entries = OrderedDict()   # client -> ClientExclusions, least recently used first
+        self._lock = threading.Lock()
+        self._client_locks = {}
+        self._stats = {"hits": 0, "builds": 0, "delta_refreshes": 0, "delta_rows": 0, "evictions": 0}
+
+    def _client_lock(self, client):
+        with self._lock:
+            return self._client_locks.setdefault(client, threading.Lock())
+
+    def _fetch(self, conn, source, client, since=None):
+        table, client_column, url_column, name_column, watermark_column = SOURCES[source]
+        columns = [url_column, name_column, watermark_column]
+        if has_linkedin_id_column(conn, table):
+            columns.append(LINKEDIN_ID_COLUMN)
+        query = f"SELECT {', '.join(columns)} FROM {table} WHERE {client_column} = %s"
+        params = [client]
+        if since is not None:
+            # >= so rows sharing the watermark timestamp are never missed (sets dedupe them)
+            query += f" AND {watermark_column} >= %s"
+            params.append(since)
+        return pd.read_sql(query, conn, params=tuple(params))
+
+    def _build(self, client):
+        entry = ClientExclusions(client)
+        conn = get_db_connection()
+        try:
+            for source in SOURCES:
+                entry.add_rows(source, self._fetch(conn, source, client))
+        finally:
+            conn.close()
+        entry.built_at = entry.refreshed_at = time.time()
+        entry.stale = False
+        self._stats["builds"] += 1
+        return entry
+
+    def _refresh(self, entry):
+        conn = get_db_connection()
+        try:
+            for source in SOURCES:
+                delta = self._fetch(conn, source, entry.client, since=entry.watermarks[source])
+                self._stats["delta_rows"] += len(delta)
+                entry.add_rows(source, delta)
+        finally:
+            conn.close()
+        entry.refreshed_at = time.time()
+        entry.stale = False
+        self._stats["delta_refreshes"] += 1
+
+    def _evict(self):
+        """Drop least recently used clients until under the memory budget (lock must be held)"""
+        while len(self._entries) > 1 and self.size_bytes() > self.memory_budget_bytes:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, client):
+        """Exclusion sets for a client, building or delta-refreshing them as needed"""
+        with self._client_lock(client):
+            with self._lock:
+                entry = self._entries.get(client)
+                if entry is not None:
+                    self._entries.move_to_end(client)
+
+            now = time.time()
+            if entry is None or now - entry.built_at > self.full_rebuild_interval:
+                entry = self._build(client)
+            elif entry.stale or now - entry.refreshed_at > self.refresh_interval:
+                self._refresh(entry)
+            else:
+                self._stats["hits"] += 1
+
+            with self._lock:
+                self._entries[client] = entry
+                self._entries.move_to_end(client)
+                self._evict()
+            return entry
+
+    def invalidate(self, client=None):
+        """Mark one client (or all) stale so the next lookup pulls a delta"""
+        with self._lock:
+            entries = self._entries.values() if client is None else [self._entries.get(client)]
+            for entry in entries:
+                if entry is not None:
+                    entry.stale = True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size_bytes(self):
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def stats(self):
+        """Cache size and lifetime counters"""
+        with self._lock:
+            return {
+                "clients": len(self._entries),
+                "size_mb": self.size_bytes() / (1024 * 1024),
+                "budget_mb": self.memory_budget_bytes / (1024 * 1024),
+                **self._stats,
+            }
+
+
+@st.cache_resource
+def get_exclusion_cache():
+    """Process-wide exclusion cache, shared across reruns, sessions and pages"""
+    # Optional 'exclusion_cache_mb' secret overrides the memory budget
+    return ExclusionCache(memory_budget_mb=float(st.secrets.get("exclusion_cache_mb", DEFAULT_MEMORY_BUDGET_MB)))
+
+
+def invalidate_client(client):
+    """Mark a client's cached exclusion sets stale (e.g. after new invites are logged)"""
+    get_exclusion_cache().invalidate(client)
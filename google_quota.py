@@ -0,0 +1,147 @@
+# =============================================================================
+# FILE: google_quota.py
+# PURPOSE: Quota-aware scheduling for Google Sheets/Drive calls (rate limit + retry)
+# =============================================================================
+
+import random
+import socket
+import threading
+import time
+
+import streamlit as st
+
+# Per-minute request quotas. Sheets counts every request inside an HTTP batch
+# separately. Override with a [google_quota] table in secrets, e.g.
+#   [google_quota]
+#   sheets_reads_per_minute = 120
+DEFAULT_QUOTAS = {
+    "sheets": 60,    # Sheets API read requests per minute per user per project (one service account)
+    "drive": 12000,  # Drive API queries per minute per user
+}
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0   # seconds; attempt n waits up to BACKOFF_BASE * 2**n (full jitter)
+BACKOFF_MAX = 64.0
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at rate_per_minute"""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        # A small burst allowance keeps concurrent workers from tripping the per-minute window
+        self.capacity = capacity or max(1.0, rate_per_minute / 6.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cost=1):
+        """Block until cost tokens are available; returns the seconds spent waiting
+
+        A cost above capacity (a large HTTP batch) waits for a full bucket and then
+        charges the whole cost, leaving the bucket in debt so later callers wait
+        for the excess to refill.
+        """
+        needed = min(cost, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= cost
+                    return waited
+                delay = (needed - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def error_status(exc):
+    """HTTP status of a googleapiclient/gspread error (None for other errors)"""
+    resp = getattr(exc, 'resp', None)  # googleapiclient.errors.HttpError
+    if resp is not None and getattr(resp, 'status', None) is not None:
+        return int(resp.status)
+    response = getattr(exc, 'response', None)  # gspread.exceptions.APIError
+    if response is not None and getattr(response, 'status_code', None) is not None:
+        return int(response.status_code)
+    return None
+
+
+def is_retryable(exc):
+    """Rate-limit, server-side and transient network errors are worth retrying"""
+    status = error_status(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    return isinstance(exc, (socket.timeout, ConnectionError, TimeoutError))
+
+
+def backoff_delay(attempt):
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+class GoogleApiScheduler:
+    """Shared rate limiter + retry policy for every Google API call in the process"""
+
+    def __init__(self, quotas=None):
+        quotas = {**DEFAULT_QUOTAS, **(quotas or {})}
+        self.buckets = {api: TokenBucket(rate) for api, rate in quotas.items()}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "throttled": 0, "throttle_seconds": 0.0, "retried": 0, "failed": 0}
+
+    def _count(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def throttle(self, api, cost=1):
+        """Take cost tokens from an API's bucket, waiting if the quota is used up"""
+        waited = self.buckets[api].acquire(cost)
+        self._count(calls=cost, throttled=int(waited > 0), throttle_seconds=waited)
+
+    def backoff(self, attempt):
+        """Count a retry and sleep before it"""
+        self._count(retried=1)
+        time.sleep(backoff_delay(attempt))
+
+    def call(self, api, fn, *args, cost=1, **kwargs):
+        """Run fn under the API's rate limit, retrying 429/5xx with backoff"""
+        for attempt in range(MAX_RETRIES + 1):
+            self.throttle(api, cost)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt == MAX_RETRIES or not is_retryable(e):
+                    self._count(failed=1)
+                    raise
+                self.backoff(attempt)
+
+    def execute(self, api, request, cost=1):
+        """call() for a googleapiclient request object"""
+        return self.call(api, request.execute, cost=cost)
+
+    def stats(self):
+        """Lifetime counters"""
+        with self._lock:
+            return dict(self._stats)
+
+    def stats_since(self, before):
+        """Counters accumulated since an earlier stats() snapshot (one run's worth)"""
+        now = self.stats()
+        return {name: round(now[name] - before.get(name, 0), 1) for name in now}
+
+
+@st.cache_resource
+def get_google_scheduler():
+    """Process-wide scheduler, so all sessions and worker threads share one quota"""
+    overrides = {}
+    try:
+        configured = st.secrets.get("google_quota", {})
+        if "sheets_reads_per_minute" in configured:
+            overrides["sheets"] = float(configured["sheets_reads_per_minute"])
+        if "drive_queries_per_minute" in configured:
+            overrides["drive"] = float(configured["drive_queries_per_minute"])
+    except Exception:
+        pass
+    return GoogleApiScheduler(overrides)
@@ -0,0 +1,186 @@
+# =============================================================================
+# FILE: inventory_refresher.py
+# PURPOSE: Background rebuild of the growth-list inventory into a shared snapshot (READ ONLY)
+# =============================================================================
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from google_quota import get_google_scheduler
+from drive_walker import walk_drive_folder, DEFAULT_WALK_WORKERS
+from sheet_inventory import scan_sheets, get_sheet_metrics_cache, DEFAULT_MAX_WORKERS, COLUMN_READER
+
+GROWTH_LIST_FOLDER_URL = 'https://drive.google.com/drive/folders/13pKJYkrbDgEqva5eHJx0Nta66gLZwzz7'
+SNAPSHOT_REFRESH_INTERVAL = 900  # seconds between background rebuilds
+GROWTH_LIST_PREFIXES = ('TBA_', 'DONE_', 'APPROVED_')
+
+
+def build_file_table(res):
+    """Active-client growth lists from a Drive walk, one row per sheet (None if there are no files)"""
+    file_records = []
+    for file_list_item in res['fileList']:
+        folder_tree = file_list_item.get('folderTree', [])
+        for file_item in file_list_item.get('files', []):
+            file_records.append({
+                'name': file_item.get('name', None),
+                'id': file_item.get('id', None),
+                'webViewLink': file_item.get('webViewLink', None),
+                'modifiedTime': file_item.get('modifiedTime', None),
+                'folderTree': folder_tree[-1] if len(folder_tree) > 0 else None
+            })
+
+    files = pd.DataFrame(file_records, columns=["name", "id", "webViewLink", "modifiedTime", "folderTree"])
+    if files.empty:
+        return None
+
+    folder_tree_names = pd.DataFrame(res['folderTree'])
+    folder_tree_names = folder_tree_names.rename(columns={"folders": "folderTree"})
+
+    files = files.merge(folder_tree_names, on='folderTree', how='left')
+    files = files.dropna(subset=['names'])
+
+    # Only growth lists, per the naming convention
+    files = files[files['name'].astype(str).str.startswith(GROWTH_LIST_PREFIXES, na=False)]
+
+    files = files.merge(folder_tree_names['names'], on='names', how='right')
+
+    # Filter for active profiles
+    files['profile_folder'] = files['names'].apply(
+        lambda x: 'yes' if 'active' in x.lower() else 'no'
+    )
+    files = files.drop(files[files['profile_folder'] == "no"].index)
+    files['names'] = files['names'].str.replace('active', '', case=False)
+    return files
+
+
+def build_inventory(creds, folder_url=GROWTH_LIST_FOLDER_URL, max_workers=DEFAULT_MAX_WORKERS,
+                    reader=COLUMN_READER, use_cache=True, progress_callback=None):
+    """Walk Drive, scan every active growth list and return a snapshot dict"""
+    started = time.time()
+    scheduler = get_google_scheduler()
+    calls_before = scheduler.stats()
+    res = walk_drive_folder(
+        creds,
+        folder_url.split('/')[-1],
+        file_fields="name,id,webViewLink,modifiedTime",
+        max_workers=DEFAULT_WALK_WORKERS
+    )
+    snapshot = {
+        "files": None,
+        "drive_files": res['totalNumberOfFiles'],
+        "drive_folders": res['totalNumberOfFolders'],
+        "drive_timing": res['timing'],
+        "failed_files": [],
+        "successful_processed": 0,
+        "cached_count": 0,
+        "sheet_count": 0,
+    }
+
+    files = build_file_table(res)
+    if files is not None and not files.empty:
+        valid_files = files.dropna(subset=['webViewLink'])
+        sheets = [
+            (idx, row['name'], row['webViewLink'].split('/')[-2],
+             row['modifiedTime'] if pd.notna(row['modifiedTime']) else None)
+            for idx, row in valid_files.iterrows()
+        ]
+        sheet_metrics, failed_files, successful_processed, cached_count = scan_sheets(
+            creds,
+            sheets,
+            max_workers=max_workers,
+            progress_callback=progress_callback,
+            reader=reader,
+            cache=get_sheet_metrics_cache() if use_cache else None
+        )
+
+        for column in ['length', 'depleted', 'rejected']:
+            files.loc[valid_files.index, column] = [sheet_metrics[idx][column] for idx in valid_files.index]
+            files[column] = files[column].fillna(0)
+        statuses = pd.Series([sheet_metrics[idx]['statuses'] for idx in valid_files.index],
+                             index=valid_files.index, dtype=object)
+        files['statuses'] = statuses.reindex(files.index).apply(lambda x: x if isinstance(x, dict) else {})
+        files['available'] = files['length'] - (files['depleted'] + files['rejected'])
+        files['approved'] = files['name'].apply(
+            lambda x: 'yes' if 'approved' in str(x).lower()
+            else ('no' if isinstance(x, str) else np.nan)
+        )
+        snapshot.update(
+            failed_files=failed_files,
+            successful_processed=successful_processed,
+            cached_count=cached_count,
+            sheet_count=len(valid_files),
+        )
+
+    snapshot["files"] = files
+    snapshot["api_calls"] = scheduler.stats_since(calls_before)
+    snapshot["built_at"] = time.time()
+    snapshot["build_seconds"] = round(snapshot["built_at"] - started, 1)
+    return snapshot
+
+
+class InventoryRefresher:
+    """Daemon thread that rebuilds the inventory snapshot every interval seconds"""
+
+    def __init__(self, creds, interval=SNAPSHOT_REFRESH_INTERVAL):
+        self.creds = creds
+        self.interval = interval
+        self.settings = {"max_workers": DEFAULT_MAX_WORKERS, "reader": COLUMN_READER, "use_cache": True}  # background scans
+        self.snapshot = None
+        self.last_error = None
+        self.refreshing = False
+        self._build_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="inventory-refresher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                pass  # kept in last_error; the page shows it next to the snapshot
+            self._stop.wait(self.interval)
+
+    def refresh(self, progress_callback=None, **settings):
+        """Rebuild the snapshot now (waits for a rebuild already in progress first)
+
+        settings override the defaults for this rebuild only; the refresher is shared
+        by every session, so one operator's choices never change the background scans.
+        """
+        with self._build_lock:
+            self.refreshing = True
+            try:
+                self.snapshot = build_inventory(self.creds, progress_callback=progress_callback,
+                                                **{**self.settings, **settings})
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                raise
+            finally:
+                self.refreshing = False
+        return self.snapshot
+
+    def get_snapshot(self, progress_callback=None):
+        """Current snapshot, building the first one in this request if none exists yet"""
+        if self.snapshot is None:
+            with self._build_lock:
+                if self.snapshot is not None:
+                    return self.snapshot
+            return self.refresh(progress_callback=progress_callback)
+        return self.snapshot
+
+    def age_seconds(self):
+        return None if self.snapshot is None else time.time() - self.snapshot["built_at"]
+
+    def stop(self):
+        self._stop.set()
+
+
+@st.cache_resource
+def get_inventory_refresher(_creds):
+    """Process-wide refresher, so every session renders the same snapshot"""
+    return InventoryRefresher(_creds)
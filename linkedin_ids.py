@@ -0,0 +1,222 @@
+# =============================================================================
+# FILE: linkedin_ids.py
+# PURPOSE: LinkedIn profile ID normalization shared by the pages and the DB
+# =============================================================================
+
+import re
+import time
+from urllib.parse import unquote
+
+import numpy as np
+import pandas as pd
+
+# Normalized ID column stored on ProfilesX and InvitedProfiles
+# (see migrate_linkedin_ids.py)
+LINKEDIN_ID_COLUMN = "LinkedInId"
+
+
+# Profile URL variants handled (matched case-insensitively, after percent-decoding):
+#   https://www.linkedin.com/in/wilbertstaring/
+#   linkedin.com/in/wilbertstaring?utm_source=share   (query strings / fragments)
+#   https://uk.linkedin.com/in/wilbertstaring         (locale subdomains)
+#   https://m.linkedin.com/in/wilbertstaring          (mobile host)
+#   https://www.linkedin.com/mwlite/in/wilbertstaring (mobile lite path)
+#   https://www.linkedin.com/pub/jane-doe/2/b5a/791   (legacy public URL -> jane-doe-791b5a2)
+IN_ID_PATTERN = r'linkedin\.com/(?:mwlite/|m/)?in/(?P<id>[^/?#\s]+)'
+PUB_ID_PATTERN = (r'linkedin\.com/pub/(?P<name>[^/?#\s]+)'
+                  r'/(?P<first>[0-9a-z]+)/(?P<second>[0-9a-z]+)/(?P<third>[0-9a-z]+)')
+
+_IN_ID_RE = re.compile(IN_ID_PATTERN)
+_PUB_ID_RE = re.compile(PUB_ID_PATTERN)
+
+# Memo of URL -> ID across calls ('' marks URLs without an ID). Cleared when full.
+MEMO_MAX_ENTRIES = 200_000
+_id_memo = {}
+
+
+def _pub_to_in_id(name, first, second, third):
+    """Legacy /pub/name/a/b/c URLs map to the vanity ID name-{c}{b}{a} (c and b zero-padded)"""
+    return f"{name}-{third.zfill(3)}{second.zfill(3)}{first}"
+
+
+def extract_linkedin_id(url):
+    """Extract LinkedIn username/ID from profile URL"""
+    if pd.isna(url) or not url:
+        return None
+    
+    # Convert to string, clean and normalize
+    url = str(url).strip()
+    if '%' in url:
+        url = unquote(url)
+    url = url.lower()
+    
+    match = _IN_ID_RE.search(url)
+    if match:
+        return match.group(1).strip() or None
+    match = _PUB_ID_RE.search(url)
+    if match:
+        return _pub_to_in_id(*match.groups())
+    return None
+
+
+def _canonicalize_unique(urls):
+    """Vectorized ID extraction over a Series of distinct URL strings ('' where no ID)"""
+    # Plain object strings: the Arrow-backed string dtypes lack extract/zfill
+    # support (or break on missing values) on the pandas 2.x releases we allow
+    urls = urls.astype(str).astype(object).str.strip()
+    encoded = urls.str.contains('%', regex=False)
+    if encoded.any():
+        urls = urls.where(~encoded, urls[encoded].map(unquote))
+    urls = urls.str.lower()
+    
+    ids = urls.str.extract(IN_ID_PATTERN, expand=False).str.strip()
+    
+    missing = ids.isna()
+    if missing.any():
+        pub = urls[missing].str.extract(PUB_ID_PATTERN)
+        pub_ids = (pub['name'] + '-' + pub['third'].str.zfill(3)
+                   + pub['second'].str.zfill(3) + pub['first'])
+        ids = ids.fillna(pub_ids)
+    
+    return ids.astype(object).fillna('')
+
+
+def canonicalize_linkedin_ids(urls):
+    """Vectorized extract_linkedin_id over a Series of profile URLs
+    
+    Each distinct URL is canonicalized once (and memoized across calls); the
+    result has the same index as the input, with None where there is no ID.
+    """
+    urls = pd.Series(urls)
+    codes, uniques = pd.factorize(urls)
+    uniques = pd.Series(uniques, dtype=object)
+    
+    ids = pd.Series([_id_memo.get(url) for url in uniques], dtype=object)
+    todo = ids.isna().to_numpy()
+    if todo.any():
+        computed = _canonicalize_unique(uniques[todo]).to_numpy(dtype=object)
+        ids[todo] = computed
+        if len(_id_memo) + len(computed) > MEMO_MAX_ENTRIES:
+            _id_memo.clear()
+        if len(computed) <= MEMO_MAX_ENTRIES:
+            _id_memo.update(zip(uniques[todo], computed))
+    
+    values = ids.to_numpy(dtype=object, copy=True)
+    values[values == ''] = None
+    result = np.full(len(urls), None, dtype=object)
+    present = codes >= 0
+    result[present] = values[codes[present]]
+    return pd.Series(result, index=urls.index, name='linkedin_id', dtype=object)
+
+
+# URL prefixes the SQL fallback recognizes, in the order IN_ID_PATTERN allows them
+SQL_IN_PREFIXES = ('linkedin.com/in/', 'linkedin.com/mwlite/in/', 'linkedin.com/m/in/')
+
+
+def linkedin_id_sql(column):
+    """T-SQL expression extracting the lowercase LinkedIn ID from a profile URL column.
+
+    Mirrors the /in/ branch of extract_linkedin_id: the text after
+    'linkedin.com/in/' (or the /mwlite/in/ and /m/in/ mobile paths) up to the next
+    '/', '?', '#' or space, on any subdomain. Percent-decoding and legacy /pub/ URLs
+    need Python, so for those the expression returns NULL (no ID, so matching
+    falls back to names) rather than an ID that disagrees with
+    canonicalize_linkedin_ids; migrate_linkedin_ids.py stores the decoded IDs.
+    Percent signs are doubled because pymssql interpolates parameters with %
+    formatting.
+    """
+    branches = []
+    for prefix in SQL_IN_PREFIXES:
+        rest = f"SUBSTRING({column}, CHARINDEX('{prefix}', {column}) + {len(prefix)}, 400)"
+        branches.append(
+            f"WHEN CHARINDEX('{prefix}', {column}) > 0 "
+            f"THEN LEFT({rest}, PATINDEX('%%[/?# ]%%', {rest} + '/') - 1)"
+        )
+    slug = f"(CASE {' '.join(branches)} END)"
+    return (
+        f"CASE WHEN {slug} LIKE '%%[%%]%%' THEN NULL "
+        f"ELSE NULLIF(LOWER(LTRIM(RTRIM({slug}))), '') END"
+    )
+
+
+_MIGRATED_TABLES = set()
+
+
+def has_linkedin_id_column(conn, table):
+    """Whether migrate_linkedin_ids.py has added the LinkedInId column to a table
+
+    Only a positive answer is remembered, so pages pick the column up as soon as
+    the migration runs, without a restart.
+    """
+    if table in _MIGRATED_TABLES:
+        return True
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COL_LENGTH('{table}', '{LINKEDIN_ID_COLUMN}')")
+    if cursor.fetchone()[0] is None:
+        return False
+    _MIGRATED_TABLES.add(table)
+    return True
+
+
+def add_linkedin_ids(df, url_column):
+    """Set df['linkedin_id'] from the stored LinkedInId column, deriving it only where missing"""
+    if LINKEDIN_ID_COLUMN in df.columns:
+        # NULL = not backfilled yet (derive it), '' = URL has no ID
+        missing = df[LINKEDIN_ID_COLUMN].isna()
+        df['linkedin_id'] = df[LINKEDIN_ID_COLUMN].replace('', None)
+        if missing.any():
+            df.loc[missing, 'linkedin_id'] = canonicalize_linkedin_ids(df.loc[missing, url_column])
+    else:
+        # Table not migrated yet - derive every ID from the URL
+        df['linkedin_id'] = canonicalize_linkedin_ids(df[url_column])
+    return df
+
+
+def benchmark_canonicalizer(n_rows=500_000, distinct_ratio=0.3):
+    """Compare Series.apply(extract_linkedin_id) with canonicalize_linkedin_ids on synthetic URLs"""
+    rng = np.random.default_rng(0)
+    # (template, share of rows) - mostly canonical URLs with a tail of variants
+    templates = [
+        ("https://www.linkedin.com/in/user{}/", 0.88),
+        ("https://uk.linkedin.com/in/User{}?originalSubdomain=uk", 0.04),
+        ("https://m.linkedin.com/in/user{}", 0.03),
+        ("linkedin.com/in/us%65r{}/", 0.02),
+        ("https://www.linkedin.com/pub/user-{}/2/b5a/791", 0.01),
+        # No ID: Sales Navigator URLs and the 'nan' strings older rows stored
+        ("https://www.linkedin.com/sales/lead/ACwAA{},NAME_SEARCH", 0.01),
+        ("nan", 0.01),
+    ]
+    n_distinct = max(1, int(n_rows * distinct_ratio))
+    numbers = rng.integers(0, n_distinct, n_rows)
+    kinds = rng.choice(len(templates), n_rows, p=[share for _, share in templates])
+    templates = [template for template, _ in templates]
+    urls = pd.Series([templates[k].format(n) for k, n in zip(kinds, numbers)])
+    
+    started = time.perf_counter()
+    expected = urls.apply(extract_linkedin_id)
+    apply_seconds = time.perf_counter() - started
+    
+    _id_memo.clear()
+    started = time.perf_counter()
+    result = canonicalize_linkedin_ids(urls)
+    vectorized_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    canonicalize_linkedin_ids(urls)
+    memoized_seconds = time.perf_counter() - started
+    
+    return {
+        "rows": n_rows,
+        "matches_apply": bool((expected.fillna('') == result.fillna('')).all()),
+        "apply_rows_per_sec": n_rows / apply_seconds,
+        "vectorized_rows_per_sec": n_rows / vectorized_seconds,
+        "memoized_rows_per_sec": n_rows / memoized_seconds,
+    }
+
+
+if __name__ == "__main__":
+    results = benchmark_canonicalizer()
+    for key, value in results.items():
+        print(f"{key}: {value:,.0f}" if isinstance(value, float) else f"{key}: {value}")
+    if not results["matches_apply"]:
+        raise SystemExit(f"canonicalize_linkedin_ids disagrees with extract_linkedin_id on pandas {pd.__version__}")
@@ -0,0 +1,57 @@
+# =============================================================================
+# FILE: migrate_invited_profiles_indexes.py
+# PURPOSE: Indexes behind the Database Viewer's keyset pagination, filters and live mode
+# USAGE: python migrate_invited_profiles_indexes.py   (reads conn_str from .streamlit/secrets.toml)
+# =============================================================================
+
+from data_access import get_db_connection
+
+TABLE = "InvitedProfiles"
+
+# (index name, key columns). Keys match the viewer's ORDER BY (all DESC) so a
+# page is an index seek to the keyset boundary plus a TOP (n) range read.
+INDEXES = [
+    ("IX_InvitedProfiles_Keyset",
+     ["DateCollected DESC", "CreatedAt DESC", "ClientName DESC", "ProfileURL DESC"]),
+    ("IX_InvitedProfiles_Client_Keyset",
+     ["ClientName", "DateCollected DESC", "CreatedAt DESC", "ProfileURL DESC"]),
+    ("IX_InvitedProfiles_Client_Category_Keyset",
+     ["ClientName", "Category", "DateCollected DESC", "CreatedAt DESC", "ProfileURL DESC"]),
+    # Live mode polls CreatedAt >= watermark every 30s
+    ("IX_InvitedProfiles_CreatedAt", ["CreatedAt"]),
+]
+
+
+def indexable(cursor, column):
+    """(N)VARCHAR(MAX) columns can't be index keys (COL_LENGTH returns -1 for them)"""
+    cursor.execute(f"SELECT COL_LENGTH('{TABLE}', '{column}')")
+    length = cursor.fetchone()[0]
+    return length is not None and length != -1
+
+
+def apply_indexes(conn):
+    """Create any missing viewer index (idempotent)"""
+    cursor = conn.cursor()
+    url_indexable = indexable(cursor, "ProfileURL")
+    for index_name, keys in INDEXES:
+        if not url_indexable:
+            # Keep the URL tie-breaker out of the key; ties are then sorted per page
+            keys = [key for key in keys if not key.startswith("ProfileURL")]
+        cursor.execute(f"""
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = '{index_name}' AND object_id = OBJECT_ID('{TABLE}'))
+                CREATE INDEX {index_name} ON {TABLE} ({', '.join(keys)})
+        """)
+        conn.commit()
+        print(f"✅ {TABLE}: {index_name} ({', '.join(keys)}) in place")
+
+
+def main():
+    conn = get_db_connection()
+    try:
+        apply_indexes(conn)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# =============================================================================
+# FILE: migrate_linkedin_ids.py
+# PURPOSE: Add + backfill the normalized LinkedInId column on ProfilesX and InvitedProfiles
+# USAGE: python migrate_linkedin_ids.py   (reads conn_str from .streamlit/secrets.toml)
+# =============================================================================
+
+import time
+
+import pandas as pd
+
+from data_access import get_db_connection, MAX_ROWS_PER_INSERT
+from linkedin_ids import LINKEDIN_ID_COLUMN, canonicalize_linkedin_ids
+
+BACKFILL_BATCH_SIZE = 5000
+
+# (table, client column, profile URL column)
+TABLES = [
+    ("ProfilesX", "Client", "ProfilePermaLink"),
+    ("InvitedProfiles", "ClientName", "ProfileURL"),
+]
+
+
+def apply_schema(conn):
+    """Add the LinkedInId column and (client, LinkedInId) index if they don't exist yet"""
+    cursor = conn.cursor()
+    for table, client_column, _ in TABLES:
+        index_name = f"IX_{table}_{client_column}_{LINKEDIN_ID_COLUMN}"
+        # Separate batches: the index can't be compiled before the column exists
+        cursor.execute(f"""
+            IF COL_LENGTH('{table}', '{LINKEDIN_ID_COLUMN}') IS NULL
+                ALTER TABLE {table} ADD {LINKEDIN_ID_COLUMN} NVARCHAR(200) NULL
+        """)
+        conn.commit()
+        cursor.execute(f"""
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = '{index_name}' AND object_id = OBJECT_ID('{table}'))
+                CREATE INDEX {index_name} ON {table} ({client_column}, {LINKEDIN_ID_COLUMN})
+        """)
+        conn.commit()
+        print(f"✅ {table}: {LINKEDIN_ID_COLUMN} column and {index_name} in place")
+
+
+def backfill(conn, table, url_column, batch_size=BACKFILL_BATCH_SIZE):
+    """Fill LinkedInId for rows that don't have it, one committed batch of distinct URLs at a time
+    
+    IDs are canonicalized in Python (canonicalize_linkedin_ids) so stored values match
+    what the app derives, including percent-encoded and legacy /pub/ URLs. URLs without
+    an ID are stored as '' so they aren't picked up again.
+    """
+    cursor = conn.cursor()
+    select_sql = f"""
+        SELECT DISTINCT TOP ({batch_size}) {url_column}
+        FROM {table}
+        WHERE {LINKEDIN_ID_COLUMN} IS NULL AND {url_column} IS NOT NULL
+    """
+    
+    total = 0
+    while True:
+        started = time.time()
+        cursor.execute(select_sql)
+        urls = [row[0] for row in cursor.fetchall()]
+        if not urls:
+            break
+        
+        ids = canonicalize_linkedin_ids(pd.Series(urls, dtype=object)).fillna('').tolist()
+        updated = 0
+        for start in range(0, len(urls), MAX_ROWS_PER_INSERT):
+            chunk = list(zip(urls[start:start + MAX_ROWS_PER_INSERT], ids[start:start + MAX_ROWS_PER_INSERT]))
+            values_sql = ", ".join(["(%s, %s)"] * len(chunk))
+            cursor.execute(f"""
+                UPDATE t SET {LINKEDIN_ID_COLUMN} = v.linkedin_id
+                FROM {table} t
+                JOIN (VALUES {values_sql}) v(url, linkedin_id) ON t.{url_column} = v.url
+                WHERE t.{LINKEDIN_ID_COLUMN} IS NULL
+            """, tuple(value for pair in chunk for value in pair))
+            updated += cursor.rowcount
+        conn.commit()
+        
+        if updated == 0:
+            # These URLs never match their rows (e.g. a collation or type mismatch on
+            # the join), so selecting them again would loop forever
+            print(f"⚠️ {table}: {len(urls):,} URLs could not be backfilled, stopping")
+            break
+        total += updated
+        print(f"   {table}: {total:,} rows backfilled ({len(urls):,} URLs in {time.time() - started:.1f}s)")
+    return total
+
+
+def main():
+    conn = get_db_connection()
+    try:
+        apply_schema(conn)
+        for table, _, url_column in TABLES:
+            total = backfill(conn, table, url_column)
+            print(f"✅ {table}: backfill complete, {total:,} rows updated")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 import pandas as pd
 import streamlit as st
 import datetime
-import pymssql
+from data_access import get_db_connection, describe_pool, bulk_insert, DEFAULT_BATCH_SIZE
+from linkedin_ids import LINKEDIN_ID_COLUMN, canonicalize_linkedin_ids, has_linkedin_id_column
+from exclusion_cache import invalidate_client
 from slack_sdk import WebClient
 
 ### STREAMLIT SECRETS CONFIGURATION ###################################
@@ -42,64 +44,72 @@ except KeyError as e:
 # Initialize Slack WebClient
 slack_client = WebClient(token=slack_token) if slack_token else None
 
-def get_db_connection():
-    """Create database connection using pymssql"""
-    try:
-        conn = pymssql.connect(
-            server=server,
-            user=username,
-            password=password,
-            database=database,
-            timeout=30,
-            login_timeout=60
-        )
-        return conn
-    except Exception as e:
-        raise Exception(f"Database connection failed: {str(e)}")
+def parse_followers(value):
+    """Parse a follower count like '1,500' into an int (0 if missing or invalid)"""
+    if pd.notna(value) and str(value).replace(',', '').isdigit():
+        return int(str(value).replace(',', ''))
+    return 0
 
-def insert_to_database(df, ClientName, Category, DateInvited_str, growth_list_url):
-    """Insert invite data directly to InvitedProfiles table"""
+def insert_to_database(df, ClientName, Category, DateInvited_str, growth_list_url, batch_size=DEFAULT_BATCH_SIZE):
+    """Insert invite data to InvitedProfiles table in batched multi-row INSERTs"""
+    if 'Profile url' not in df.columns:
+        st.error("❌ The file has no 'Profile url' column - nothing was inserted.")
+        return
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
         
-        inserted_count = 0
         errors = []
+        rows = []
         
         st.info("🔄 Processing CSV data...")
         progress_bar = st.progress(0)
         
+        # '' = checked, no LinkedIn ID in the URL (NULL is left for rows not yet backfilled).
+        # Before migrate_linkedin_ids.py has run there is no column to write it to.
+        store_linkedin_ids = has_linkedin_id_column(conn, "InvitedProfiles")
+        linkedin_ids = canonicalize_linkedin_ids(df['Profile url']).fillna('')
+        
         for index, row in df.iterrows():
             try:
-                # Update progress
-                progress_bar.progress((index + 1) / len(df))
-                
-                cursor.execute("""
-                    INSERT INTO InvitedProfiles 
-                    (ClientName, FullName, ProfileURL, Title, Location, Organization1, 
-                     Followers, DateCollected, GroupName, Category, CreatedAt, UpdatedAt)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, GETDATE(), GETDATE())
-                """, (
+                rows.append((index, (
                     ClientName,
                     str(row.get('Full name', '')),
                     str(row.get('Profile url', '')),
                     str(row.get('Title', '')),
                     str(row.get('Location', '')),
                     str(row.get('Organization 1', '')),
-                    int(row.get('Followers', 0)) if pd.notna(row.get('Followers', 0)) and str(row.get('Followers', 0)).replace(',', '').isdigit() else 0,
+                    parse_followers(row.get('Followers', 0)),
                     DateInvited_str,
                     growth_list_url,
-                    Category
-                ))
-                inserted_count += 1
+                    Category,
+                ) + ((linkedin_ids[index],) if store_linkedin_ids else ())))
             except Exception as row_error:
                 errors.append(f"Row {index + 1} ({row.get('Full name', 'Unknown')}): {str(row_error)}")
-                continue
+        
+        inserted_count, failed_rows = bulk_insert(
+            conn,
+            "InvitedProfiles",
+            ["ClientName", "FullName", "ProfileURL", "Title", "Location", "Organization1",
+             "Followers", "DateCollected", "GroupName", "Category"]
+            + ([LINKEDIN_ID_COLUMN] if store_linkedin_ids else []),
+            rows,
+            batch_size=batch_size,
+            sql_values={"CreatedAt": "GETDATE()", "UpdatedAt": "GETDATE()"},
+            progress_callback=lambda done, total: progress_bar.progress(done / total)
+        )
+        for index, row_error in failed_rows:
+            errors.append(f"Row {index + 1} ({df.loc[index].get('Full name', 'Unknown')}): {str(row_error)}")
         
         progress_bar.empty()
-        conn.commit()
         conn.close()
         
+        # New invites should show up in the excluder's cached sets for this client
+        # and in this page's dropdowns / recent activity
+        if inserted_count > 0:
+            invalidate_client(ClientName)
+            get_client_catalog.clear()
+            get_recent_activity.clear()
+        
         if errors:
             st.warning(f"⚠️ Inserted {inserted_count} records. {len(errors)} errors:")
             with st.expander("🔍 View Errors"):
@@ -153,43 +163,65 @@ def send_slack_message(message):
     except Exception as e:
         st.error(f"Slack connection error: {str(e)}")
 
-def get_invited_profiles():
-    """Get all invited profiles from database"""
+CATALOG_TTL = 300  # seconds the client/category catalog is shared across sessions
+
+@st.cache_data(ttl=CATALOG_TTL, show_spinner=False)
+def get_client_catalog():
+    """Client -> category catalog with record counts (one small aggregate, cached)"""
+    conn = get_db_connection()
     try:
-        conn = get_db_connection()
-        query = "SELECT * FROM InvitedProfiles ORDER BY CreatedAt DESC"
-        df = pd.read_sql(query, conn)
+        query = """
+        SELECT ClientName, Category, COUNT(*) AS Records
+        FROM InvitedProfiles
+        GROUP BY ClientName, Category
+        """
+        return pd.read_sql(query, conn)
+    finally:
+        conn.close()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_recent_activity(limit=10):
+    """Latest (client, category, date) upload groups, aggregated on the server"""
+    conn = get_db_connection()
+    try:
+        # Only the newest `limit` distinct dates can hold the top `limit` groups,
+        # so the GROUP BY never touches older rows
+        query = f"""
+        SELECT TOP ({int(limit)}) ClientName, Category, DateCollected, COUNT(*) AS Count
+        FROM InvitedProfiles
+        WHERE DateCollected >= (
+            SELECT MIN(DateCollected) FROM (
+                SELECT DISTINCT TOP ({int(limit)}) DateCollected
+                FROM InvitedProfiles
+                ORDER BY DateCollected DESC
+            ) recent_dates
+        )
+        GROUP BY ClientName, Category, DateCollected
+        ORDER BY DateCollected DESC, MAX(CreatedAt) DESC
+        """
+        return pd.read_sql(query, conn)
+    finally:
         conn.close()
-        return df
-    except Exception as e:
-        st.error(f"❌ Database connection error: {str(e)}")
-        return pd.DataFrame()
 
 def test_database_connection():
     """Test if database connection works"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM InvitedProfiles")
-        count = cursor.fetchone()[0]
-        
-        # Get some recent records for preview
-        cursor.execute("""
-            SELECT TOP 5 ClientName, Category, DateCollected, COUNT(*) as Records
-            FROM InvitedProfiles 
-            GROUP BY ClientName, Category, DateCollected
-            ORDER BY MAX(CreatedAt) DESC
-        """)
-        recent_data = cursor.fetchall()
-        
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
         conn.close()
         
+        # Counts and preview come from the cached aggregates, not table scans
+        count = int(get_client_catalog()['Records'].sum())
+        recent_data = get_recent_activity().head(5)
+        
         st.success(f"✅ Database connected successfully! Found {count:,} existing records.")
         
-        if recent_data:
+        if not recent_data.empty:
             st.info("📊 Recent activity:")
-            for row in recent_data:
-                st.text(f"• {row[0]} - {row[1]} - {row[2]} ({row[3]} records)")
+            for row in recent_data.itertuples(index=False):
+                st.text(f"• {row.ClientName} - {row.Category} - {row.DateCollected} ({row.Count} records)")
         
         return True
     except Exception as e:
@@ -240,6 +272,7 @@ def app():
     # Show current configuration
     with st.expander("🔧 Current Configuration"):
         st.text(f"Database: {database} on {server}")
+        st.text(describe_pool())
         st.text(f"Username: {username}")
         st.text(f"Slack Channel ID: {target_channel_id}")
     
@@ -260,21 +293,23 @@ def app():
         st.info("💡 Install pymssql: pip install pymssql")
         return
     
-    # Get existing data for dropdowns
+    # Get existing clients/categories for dropdowns
     with st.spinner("Loading existing data from database..."):
-        invited_profiles = get_invited_profiles()
+        try:
+            catalog = get_client_catalog()
+        except Exception as e:
+            st.error(f"❌ Database connection error: {str(e)}")
+            catalog = pd.DataFrame(columns=['ClientName', 'Category', 'Records'])
     
-    if not invited_profiles.empty:
-        st.info(f"📊 Database contains {len(invited_profiles):,} total records from {invited_profiles['ClientName'].nunique()} clients")
+    if not catalog.empty:
+        st.info(f"📊 Database contains {int(catalog['Records'].sum()):,} total records from {catalog['ClientName'].nunique()} clients")
         
         # Show recent activity
         with st.expander("📈 Recent Database Activity"):
-            recent_summary = invited_profiles.groupby(['ClientName', 'Category', 'DateCollected']).size().reset_index(name='Count')
-            recent_summary = recent_summary.sort_values('DateCollected', ascending=False).head(10)
-            st.dataframe(recent_summary, use_container_width=True)
+            st.dataframe(get_recent_activity(), use_container_width=True)
         
         # Client selection
-        existing_clients = sorted(invited_profiles['ClientName'].dropna().unique())
+        existing_clients = sorted(catalog['ClientName'].dropna().unique())
         client_options = existing_clients + ["➕ Enter Custom Name"]
         selected_client = st.selectbox("🏢 Select client name", client_options)
         
@@ -285,8 +320,8 @@ def app():
         
         # Category selection based on selected client
         if selected_client_name and selected_client_name in existing_clients:
-            client_categories = sorted(invited_profiles[
-                invited_profiles['ClientName'] == selected_client_name
+            client_categories = sorted(catalog[
+                catalog['ClientName'] == selected_client_name
             ]['Category'].dropna().unique())
             category_options = client_categories + ["➕ Enter Custom Category"]
         else:
@@ -416,6 +451,15 @@ def app():
             for msg in submit_messages:
                 st.text(msg)
             
+            with st.expander("⚙️ Advanced Upload Settings"):
+                batch_size = st.number_input(
+                    "Rows per INSERT batch",
+                    min_value=1,
+                    max_value=1000,
+                    value=DEFAULT_BATCH_SIZE,
+                    help="Each batch is one transaction. A failing batch is retried row by row to report the bad rows."
+                )
+            
             # Submit button
             if can_submit:
                 if st.button("🚀 Log Invites to Database", type="primary", use_container_width=True):
@@ -425,7 +469,8 @@ def app():
                             selected_client_name, 
                             selected_category_name, 
                             DateInvited_str, 
-                            growth_list_url
+                            growth_list_url,
+                            batch_size=batch_size
                         )
             else:
                 st.error("Please fix the issues above before submitting.")
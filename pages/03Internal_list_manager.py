@@ -6,11 +6,10 @@
 import streamlit as st
 import pandas as pd
 from google.oauth2 import service_account
-from getfilelistpy import getfilelist
-import pygsheets
 import json
-import numpy as np
-import pymssql
+from data_access import get_db_connection, describe_pool
+from sheet_inventory import COLUMN_READER, FULL_GRID_READER
+from inventory_refresher import get_inventory_refresher, SNAPSHOT_REFRESH_INTERVAL
 
 ### STREAMLIT SECRETS CONFIGURATION ###################################
 # This app is configured to use Streamlit secrets.
@@ -60,21 +59,6 @@ creds = service_account.Credentials.from_service_account_info(
 )
 ################################################################
 
-def get_db_connection():
-    """Create database connection using pymssql"""
-    try:
-        conn = pymssql.connect(
-            server=server,
-            user=username,
-            password=password,
-            database=database,
-            timeout=30,
-            login_timeout=60
-        )
-        return conn
-    except Exception as e:
-        raise Exception(f"Database connection failed: {str(e)}")
-
 def get_list_usage_stats():
     """Get growth list usage statistics from database"""
     try:
@@ -97,8 +81,8 @@ def get_list_usage_stats():
         st.error(f"Error loading database stats: {str(e)}")
         return pd.DataFrame()
 
-def test_connections():
-    """Test both database and Google Drive connections"""
+def test_connections(snapshot=None, drive_error=None):
+    """Test both database and Google Drive connections (Drive check uses the inventory snapshot)"""
     results = {"database": False, "google_drive": False}
     
     # Test database
@@ -114,31 +98,105 @@ def test_connections():
         st.error(f"❌ Database connection failed: {str(e)}")
     
     # Test Google Drive
-    try:
-        folder_url = 'https://drive.google.com/drive/folders/13pKJYkrbDgEqva5eHJx0Nta66gLZwzz7'
-        resource = {
-            "service_account": creds,
-            "id": folder_url.split('/')[-1],
-            "fields": "files(name,id)",
-        }
-        res = getfilelist.GetFileList(resource)
-        file_count = sum(len(item.get('files', [])) for item in res['fileList'])
-        st.success(f"✅ Google Drive connected! {file_count} files found")
+    if snapshot is None:
+        st.error(f"❌ Google Drive connection failed: {str(drive_error)}")
+    else:
+        st.success(f"✅ Google Drive connected! {snapshot['drive_files']} files found")
         results["google_drive"] = True
-    except Exception as e:
-        st.error(f"❌ Google Drive connection failed: {str(e)}")
+        if drive_error is not None:
+            st.warning(f"⚠️ Last background refresh failed, showing the previous snapshot: {str(drive_error)}")
     
     return results
 
-def get_files_in_nested_folders(folder_url):
-    """Get files in Google Drive folders - READ ONLY"""
-    resource = {
-        "service_account": creds,
-        "id": folder_url.split('/')[-1],
-        "fields": "files(name,id,webViewLink)",
-    }
-    res = getfilelist.GetFileList(resource)
-    return res
+def format_age(seconds):
+    """Human-readable snapshot age"""
+    if seconds < 60:
+        return f"{int(seconds)}s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min"
+    return f"{seconds / 3600:.1f} h"
+
+LIST_PAGE_SIZES = [50, 100, 250, 500]
+
+def client_summary_table(files):
+    """One row per client: list count, names, available and approved lists"""
+    summary = files.assign(approved_list=files['approved'].eq('yes')).groupby('names').agg(
+        Lists=('name', 'count'),
+        Total=('length', 'sum'),
+        Available=('available', 'sum'),
+        Approved=('approved_list', 'sum'),
+    )
+    summary.index.name = 'Client'
+    return summary.astype(int)
+
+def render_list_table(files):
+    """Paginated table of growth lists with link columns (one widget however many lists)"""
+    lists = files.dropna(subset=['name']).sort_values(['names', 'name'])
+    if lists.empty:
+        st.info("No growth lists to show.")
+        return
+    
+    table = pd.DataFrame({
+        'Client': lists['names'],
+        'List': lists['name'],
+        'Sheet': lists['webViewLink'],
+        'Total': lists['length'].astype(int),
+        'Available': lists['available'].astype(int),
+        'Depleted': lists['depleted'].astype(int),
+        'Rejected': lists['rejected'].astype(int),
+        'Status': lists['approved'].map({'yes': "✅ Approved"}).fillna("⏳ Pending"),
+    })
+    
+    size_col, page_col, _ = st.columns([1, 1, 2])
+    with size_col:
+        page_size = st.selectbox("Lists per page", LIST_PAGE_SIZES, index=1)
+    page_count = max(1, -(-len(table) // page_size))
+    with page_col:
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1)
+    
+    start = (page - 1) * page_size
+    st.dataframe(
+        table.iloc[start:start + page_size],
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'Sheet': st.column_config.LinkColumn("Sheet", help="Open the growth list in Google Sheets"),
+        }
+    )
+    st.caption(f"Showing lists {start + 1}-{min(start + page_size, len(table))} of {len(table)}")
+
+def render_client_cards(name, group):
+    """Detailed per-list cards for one client"""
+    with st.expander(f"👤 {name} ({len(group)} lists)", expanded=True):
+        # Summary for this client
+        client_total = group['length'].sum()
+        client_available = group['available'].sum()
+        client_approved = (group['approved'] == 'yes').sum()
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Names", int(client_total))
+        with col2:
+            st.metric("Available", int(client_available))
+        with col3:
+            st.metric("Approved Lists", client_approved)
+        
+        # Individual files
+        for idx, row in group.iterrows():
+            col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
+            
+            with col1:
+                if pd.notna(row['webViewLink']):
+                    st.markdown(f"**[{row['name']}]({row['webViewLink']})**")
+                else:
+                    st.markdown(f"**{row['name']}** (No link)")
+            with col2:
+                st.metric("Total", int(row['length']))
+            with col3:
+                st.metric("Available", int(row['available']))
+            with col4:
+                status = "✅ Approved" if row['approved'] == 'yes' else "⏳ Pending"
+                st.write(status)
 
 def main():
     st.title("📂 Growth List Manager V2")
@@ -161,12 +219,69 @@ def main():
     # Show configuration
     with st.expander("Current Configuration"):
         st.text(f"Database: {database} on {server} (for usage tracking)")
+        st.text(describe_pool())
         st.text(f"Google Drive: Connected for file management")
         st.text(f"Hybrid: Drive files + Database analytics")
     
+    # Drive + Sheets scanning runs in a shared background refresher; the page renders its snapshot
+    refresher = get_inventory_refresher(creds)
+    
+    # Widget keys keep each operator's choices in their own session; they only apply
+    # to that operator's manual refresh, background scans keep the defaults
+    with st.expander("⚙️ Scan settings (used when you refresh now)"):
+        max_workers = st.slider(
+            "Parallel sheet reads",
+            min_value=1,
+            max_value=32,
+            value=refresher.settings["max_workers"],
+            help="How many growth lists are read from Google Sheets at the same time",
+            key="scan_max_workers"
+        )
+        full_grid_reads = st.checkbox(
+            "Read full sheets (slower)",
+            value=refresher.settings["reader"] == FULL_GRID_READER,
+            help="By default only the header, first column and 'Sent' column are read. "
+                 "Full reads count rows with any non-empty cell.",
+            key="scan_full_grid_reads"
+        )
+        use_sheet_cache = st.checkbox(
+            "Reuse saved counts for unchanged sheets",
+            value=refresher.settings["use_cache"],
+            help="Only sheets whose Google Drive 'modified' time changed since the last scan are read again",
+            key="scan_use_cache"
+        )
+    
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    
+    def show_progress(done, total, name):
+        progress_bar.progress(done / total)
+        status_text.text(f"Processed file {done} of {total}: {str(name)[:50]}...")
+    
+    snapshot, drive_error = None, None
+    try:
+        if st.button("🔄 Refresh growth lists now"):
+            with st.spinner("Rescanning Google Drive and growth lists..."):
+                snapshot = refresher.refresh(
+                    progress_callback=show_progress,
+                    max_workers=max_workers,
+                    reader=FULL_GRID_READER if full_grid_reads else COLUMN_READER,
+                    use_cache=use_sheet_cache
+                )
+        else:
+            with st.spinner("Loading growth list inventory..."):
+                snapshot = refresher.get_snapshot(progress_callback=show_progress)
+    except Exception:
+        # Keep rendering the last good snapshot; the error is reported with the connection tests
+        snapshot = refresher.snapshot
+    drive_error = refresher.last_error
+    
+    progress_bar.empty()
+    status_text.empty()
+    
     # Test connections
     st.subheader("Connection Tests")
-    connections = test_connections()
+    connections = test_connections(snapshot, drive_error)
     
     if not connections["google_drive"]:
         st.error("Google Drive connection required for file management.")
@@ -185,143 +300,36 @@ def main():
     st.subheader("📁 Google Drive Growth Lists (READ-ONLY)")
     st.info("🔒 This app only reads files - no modifications or deletions possible")
     
-    folder_url = 'https://drive.google.com/drive/folders/13pKJYkrbDgEqva5eHJx0Nta66gLZwzz7'
-    
-    with st.spinner("Loading files from Google Drive..."):
-        res = get_files_in_nested_folders(folder_url)
-    
-    # Process file records (same logic as original)
-    file_records = []
-    for file_list_item in res['fileList']:
-        file_data = file_list_item.get('files', [])
-        folder_tree = file_list_item.get('folderTree', [])
-        
-        for file_item in file_data:
-            name = file_item.get('name', None)
-            id = file_item.get('id', None)
-            webViewLink = file_item.get('webViewLink', None)
-            
-            file_records.append({
-                'name': name,
-                'id': id,
-                'webViewLink': webViewLink,
-                'folderTree': folder_tree
-            })
-    
-    # Process folder structure
-    for record in file_records:
-        folder_tree = record['folderTree']
-        if len(folder_tree) > 0:
-            record['folderTree'] = folder_tree[-1]
-        else:
-            record['folderTree'] = None
-    
-    files = pd.DataFrame(file_records, columns=["name", "id", "webViewLink", "folderTree"])
+    age_note = " (background refresh running)" if refresher.refreshing else ""
+    st.caption(
+        f"🕒 Snapshot is {format_age(refresher.age_seconds())} old, built in {snapshot['build_seconds']}s{age_note}. "
+        f"Refreshed automatically every {SNAPSHOT_REFRESH_INTERVAL // 60} minutes."
+    )
+    with st.expander("⏱️ Drive folder walk timing"):
+        st.dataframe(pd.DataFrame(snapshot['drive_timing']), use_container_width=True)
+        st.text(f"{snapshot['drive_folders']} folders, {snapshot['drive_files']} files")
+        api_calls = snapshot['api_calls']
+        st.text(
+            f"Google API calls this scan: {int(api_calls['calls']):,} - {int(api_calls['retried'])} retried, "
+            f"{int(api_calls['throttled'])} throttled ({api_calls['throttle_seconds']}s waiting for quota), "
+            f"{int(api_calls['failed'])} failed"
+        )
     
-    if files.empty:
+    files = snapshot['files']  # shared across sessions - copy before changing it
+    if files is None:
         st.warning("No files found in Google Drive folder.")
         return
-    
-    folder_tree_names = pd.DataFrame(res['folderTree'])
-    folder_tree_names = folder_tree_names.rename(columns={"folders": "folderTree"})
-    
-    files = files.merge(folder_tree_names, on='folderTree', how='left')
-    files = files.dropna(subset=['names'])
-
-    # Filter files based on specified prefixes for performance, per user request
-    prefixes_to_include = ['TBA_', 'DONE_', 'APPROVED_']
-    files = files[files['name'].astype(str).str.startswith(tuple(prefixes_to_include), na=False)]
-
-    files = files.merge(folder_tree_names['names'], on='names', how='right')
-
-    # Filter for active profiles
-    files['profile_folder'] = files['names'].apply(
-        lambda x: 'yes' if 'active' in x.lower() else 'no'
-    )
-    files = files.drop(files[files['profile_folder'] == "no"].index)
-    files['names'] = files['names'].str.replace('active', '', case=False)
-    
     if files.empty:
         st.info("No active growth lists found.")
         return
     
-    # Count rows in sheets using pygsheets (READ ONLY - no modifications)
-    gc = pygsheets.authorize(custom_credentials=creds)
-    
-    total_lengths = []
-    depleted_lengths = []
-    rejected_lengths = []
-    
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    valid_files = files.dropna(subset=['webViewLink'])
-    successful_processed = 0
-    failed_files = []
-    
-    for i, (idx, row) in enumerate(valid_files.iterrows()):
-        progress_bar.progress((i + 1) / len(valid_files))
-        status_text.text(f"Processing file {i + 1} of {len(valid_files)}: {row['name'][:50]}...")
-        
-        try:
-            sheet_id = row['webViewLink'].split('/')[-2]
-            
-            # Alternative approach: Try pygsheets first, fallback to direct API if needed
-            try:
-                # Method 1: pygsheets (usually works)
-                sheet = gc.open_by_key(sheet_id)
-                worksheet = sheet[0]
-                all_values = worksheet.get_all_values()
-            except Exception as pygsheets_error:
-                # Method 2: Direct API call with proper authentication
-                import gspread
-                gc_gspread = gspread.authorize(creds)
-                sheet_gspread = gc_gspread.open_by_key(sheet_id)
-                worksheet_gspread = sheet_gspread.sheet1
-                all_values = worksheet_gspread.get_all_values()
-            
-            if not all_values:
-                total_lengths.append(0)
-                depleted_lengths.append(0)
-                rejected_lengths.append(0)
-                continue
-            
-            header_row = all_values[0]
-            
-            if "Sent" not in header_row:
-                # No "Sent" column, just count total rows
-                total_count = len([row for row in all_values if any(row)])
-                total_lengths.append(total_count)
-                depleted_lengths.append(0)
-                rejected_lengths.append(0)
-                successful_processed += 1
-                continue
-            
-            sent_column_index = header_row.index("Sent")
-            total_count = sum(1 for row in all_values if any(row))
-            depleted_count = sum(1 for row in all_values 
-                               if len(row) > sent_column_index and row[sent_column_index] == "Depleted")
-            rejected_count = sum(1 for row in all_values 
-                               if len(row) > sent_column_index and row[sent_column_index] == "Rejected")
-            
-            total_lengths.append(total_count)
-            depleted_lengths.append(depleted_count)
-            rejected_lengths.append(rejected_count)
-            successful_processed += 1
-            
-        except Exception as e:
-            error_msg = f"{row['name']}: {str(e)}"
-            failed_files.append(error_msg)
-            total_lengths.append(0)
-            depleted_lengths.append(0)
-            rejected_lengths.append(0)
-    
-    progress_bar.empty()
-    status_text.empty()
-    
     # Show processing summary
+    failed_files = snapshot['failed_files']
+    successful_processed = snapshot['successful_processed']
+    if snapshot['cached_count']:
+        st.info(f"♻️ {snapshot['cached_count']} of {snapshot['sheet_count']} sheets unchanged since the previous scan (saved counts reused)")
     if failed_files:
-        st.warning(f"⚠️ Processed {successful_processed}/{len(valid_files)} files. {len(failed_files)} files had issues:")
+        st.warning(f"⚠️ Processed {successful_processed}/{snapshot['sheet_count']} files. {len(failed_files)} files had issues:")
         with st.expander("🔍 View Failed Files (READ-ONLY ERRORS)"):
             for error in failed_files:
                 st.text(f"• {error}")
@@ -329,19 +337,6 @@ def main():
     else:
         st.success(f"✅ Successfully processed all {successful_processed} files (READ-ONLY)")
     
-    # Add metrics to dataframe
-    files.loc[valid_files.index, 'length'] = total_lengths
-    files.loc[valid_files.index, 'depleted'] = depleted_lengths
-    files.loc[valid_files.index, 'rejected'] = rejected_lengths
-    files['length'] = files['length'].fillna(0)
-    files['depleted'] = files['depleted'].fillna(0)
-    files['rejected'] = files['rejected'].fillna(0)
-    files['available'] = files['length'] - (files['depleted'] + files['rejected'])
-    files['approved'] = files['name'].apply(
-        lambda x: 'yes' if 'approved' in str(x).lower() 
-        else ('no' if isinstance(x, str) else np.nan)
-    )
-    
     # Display results grouped by client
     st.subheader("📊 Growth List Status by Client")
     
@@ -357,39 +352,26 @@ def main():
         approved_count = (files['approved'] == 'yes').sum()
         st.metric("✅ Approved", approved_count)
     
-    grouped = files.groupby('names')
-    
-    for name, group in grouped:
-        with st.expander(f"👤 {name} ({len(group)} lists)", expanded=True):
-            # Summary for this client
-            client_total = group['length'].sum()
-            client_available = group['available'].sum()
-            client_approved = (group['approved'] == 'yes').sum()
-            
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Total Names", int(client_total))
-            with col2:
-                st.metric("Available", int(client_available))
-            with col3:
-                st.metric("Approved Lists", client_approved)
-            
-            # Individual files
-            for idx, row in group.iterrows():
-                col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
-                
-                with col1:
-                    if pd.notna(row['webViewLink']):
-                        st.markdown(f"**[{row['name']}]({row['webViewLink']})**")
-                    else:
-                        st.markdown(f"**{row['name']}** (No link)")
-                with col2:
-                    st.metric("Total", int(row['length']))
-                with col3:
-                    st.metric("Available", int(row['available']))
-                with col4:
-                    status = "✅ Approved" if row['approved'] == 'yes' else "⏳ Pending"
-                    st.write(status)
+    # Every value seen in the 'Sent' columns, not just Depleted/Rejected
+    status_counts = pd.DataFrame(files['statuses'].tolist(), index=files.index).fillna(0)
+    if not status_counts.empty:
+        with st.expander("🏷️ 'Sent' status breakdown by client"):
+            breakdown = status_counts.groupby(files['names']).sum().astype(int)
+            breakdown.loc['All clients'] = breakdown.sum()
+            st.dataframe(breakdown, use_container_width=True)
+    
+    # One table for every list; per-client cards are only built for the client picked below
+    clients = sorted(files['names'].dropna().unique())
+    table_col, pick_col = st.columns([3, 1])
+    with pick_col:
+        drill_down = st.selectbox("🔎 Client drill-down", ["(none)"] + clients)
+    with table_col:
+        st.dataframe(client_summary_table(files), use_container_width=True)
+    
+    render_list_table(files if drill_down == "(none)" else files[files['names'] == drill_down])
+    
+    if drill_down != "(none)":
+        render_client_cards(drill_down, files[files['names'] == drill_down])
     
     # Show database correlation if available
     if connections["database"] and not usage_stats.empty:
@@ -6,6 +6,9 @@
 import streamlit as st
 import pandas as pd
 import pymssql
+from data_access import get_db_connection, describe_pool
+from linkedin_ids import LINKEDIN_ID_COLUMN, linkedin_id_sql, has_linkedin_id_column
+from connection_filters import ConnectionFilter
 import datetime
 ### STREAMLIT SECRETS CONFIGURATION ###################################
 # This app is configured to use Streamlit secrets.
@@ -38,50 +41,224 @@ except KeyError as e:
     st.stop()
 ################################################################
 
-def get_db_connection():
-    """Create database connection using pymssql"""
+ALL_CATEGORIES = "🌟 All Categories"
+
+def linkedin_key_sql(table, url_column, migrated_tables):
+    """LinkedIn ID expression for a table: the stored ID where the migration added one, else derived from the URL"""
+    derived = linkedin_id_sql(url_column)
+    key = f"COALESCE({LINKEDIN_ID_COLUMN}, {derived})" if table in migrated_tables else derived
+    return f"NULLIF({key}, '')"
+
+def accepted_connections_sql(client_name, migrated_tables=()):
+    """Query + params for one client's accepted connections (invited AND now connected)
+    
+    Both sides are narrowed to the client first, so the work scales with the client's
+    rows rather than the tables. People are matched on the normalized LinkedIn ID
+    (derived from the URL for rows not backfilled yet, or for every row of a table
+    not in migrated_tables); when either side has no ID the name is used instead,
+    as before. Each invited row appears once, with the latest connection date.
+    Returns only the display columns; the page filters the memoized result.
+    """
+    params = {'client': client_name}
+    
+    query = f"""
+    WITH connections AS (
+        SELECT {linkedin_key_sql('ProfilesX', 'ProfilePermaLink', migrated_tables)} AS LinkedInKey,
+               Name, ProfileDate
+        FROM ProfilesX
+        WHERE Client = %(client)s
+    ),
+    by_id AS (
+        SELECT LinkedInKey, MAX(ProfileDate) AS ProfileDate
+        FROM connections WHERE LinkedInKey IS NOT NULL GROUP BY LinkedInKey
+    ),
+    by_name AS (
+        SELECT Name, MAX(ProfileDate) AS ProfileDate
+        FROM connections GROUP BY Name
+    ),
+    by_name_without_id AS (
+        SELECT Name, MAX(ProfileDate) AS ProfileDate
+        FROM connections WHERE LinkedInKey IS NULL GROUP BY Name
+    ),
+    invited AS (
+        SELECT {linkedin_key_sql('InvitedProfiles', 'ProfileURL', migrated_tables)} AS LinkedInKey,
+               FullName, Title, Organization1, ProfileURL, Followers, Category, DateCollected
+        FROM InvitedProfiles
+        WHERE ClientName = %(client)s
+    ),
+    accepted AS (
+        SELECT i.*, COALESCE(id_match.ProfileDate, name_match.ProfileDate, loose_match.ProfileDate) AS ConnectedOn,
+               CASE WHEN id_match.LinkedInKey IS NOT NULL OR name_match.Name IS NOT NULL
+                         OR loose_match.Name IS NOT NULL THEN 1 ELSE 0 END AS Matched
+        FROM invited i
+        LEFT JOIN by_id id_match ON id_match.LinkedInKey = i.LinkedInKey
+        -- Invited row without an ID: any connection with the same name
+        LEFT JOIN by_name name_match ON i.LinkedInKey IS NULL AND name_match.Name = i.FullName
+        -- Invited row with an ID: same-name connections that have no ID to compare
+        LEFT JOIN by_name_without_id loose_match ON i.LinkedInKey IS NOT NULL AND id_match.LinkedInKey IS NULL
+                                                AND loose_match.Name = i.FullName
+    )
+    SELECT a.FullName AS [Name],
+           a.Title,
+           a.Organization1 AS [Organization],
+           a.ProfileURL AS [Profile URL],
+           CASE WHEN a.ProfileURL IS NULL OR a.ProfileURL = '' THEN ''
+                ELSE a.ProfileURL + '/recent-activity/all/' END AS [Posts URL],
+           a.Followers,
+           a.Category,
+           a.DateCollected AS [Invited On],
+           a.ConnectedOn AS [Connected On (Approx)]
+    FROM accepted a
+    WHERE a.Matched = 1
+    """
+    return query, params
+
+DATA_VERSION_TTL = 15        # seconds a client's data version is trusted before re-checking
+ACCEPTED_CACHE_ENTRIES = 32  # client frames kept process-wide
+
+@st.cache_data(ttl=DATA_VERSION_TTL, show_spinner=False)
+def get_data_version(client_name):
+    """Row counts + latest CreatedAt of a client's connections and invites; changes when data arrives
+    
+    Returns (connections, connections_latest, invited, invited_latest).
+    """
+    conn = get_db_connection()
     try:
-        conn = pymssql.connect(
-            server=server,
-            user=username,
-            password=password,
-            database=database,
-            timeout=30,
-            login_timeout=60
-        )
-        return conn
-    except Exception as e:
-        raise Exception(f"Database connection failed: {str(e)}")
+        cursor = conn.cursor()
+        cursor.execute("""
+        SELECT c.Records, c.Latest, i.Records, i.Latest
+        FROM (SELECT COUNT(*) AS Records, MAX(CreatedAt) AS Latest FROM ProfilesX WHERE Client = %(client)s) c
+        CROSS JOIN (SELECT COUNT(*) AS Records, MAX(CreatedAt) AS Latest FROM InvitedProfiles WHERE ClientName = %(client)s) i
+        """, {'client': client_name})
+        return tuple(cursor.fetchone())
+    finally:
+        conn.close()
 
-def get_all_connections():
-    """Get all connections from ProfilesX table"""
+@st.cache_data(max_entries=ACCEPTED_CACHE_ENTRIES, show_spinner=False)
+def load_accepted_frame(client_name, data_version):
+    """A client's unfiltered accepted connections at one data version (shared across sessions)"""
+    conn = get_db_connection()
     try:
-        conn = get_db_connection()
-        query = "SELECT * FROM ProfilesX"
-        df = pd.read_sql(query, conn)
+        migrated_tables = {table for table in ("ProfilesX", "InvitedProfiles") if has_linkedin_id_column(conn, table)}
+        query, params = accepted_connections_sql(client_name, migrated_tables)
+        df = pd.read_sql(query, conn, params=params)
+    finally:
         conn.close()
-        return df
-    except Exception as e:
-        st.error(f"❌ Error loading connections: {str(e)}")
-        return pd.DataFrame()
+    df['Invited On'] = pd.to_datetime(df['Invited On'])
+    df['Connected On (Approx)'] = pd.to_datetime(df['Connected On (Approx)'])
+    # Sorted once here, so filtered views come out newest-first without a per-rerun sort
+    return df.sort_values(by='Connected On (Approx)', ascending=False, kind='stable').reset_index(drop=True)
+
+SESSION_MEMO_ENTRIES = 4  # (client, data version) frames and filters kept per session
 
-def get_invited_profiles():
-    """Get all invited profiles from InvitedProfiles table (was Google Sheets)"""
+def session_memo(name, key, build):
+    """Small per-session LRU in st.session_state[name], keyed by (client, data version)
+    
+    The top client selector and the saved-search client filter can point at
+    different clients, so a single slot would flip between them on every rerun.
+    """
+    memo = st.session_state.setdefault(name, {})
+    if key in memo:
+        memo[key] = memo.pop(key)  # most recently used last
+        return memo[key]
+    value = build()
+    memo[key] = value
+    while len(memo) > SESSION_MEMO_ENTRIES:
+        memo.pop(next(iter(memo)))
+    return value
+
+def get_accepted_frame(client_name):
+    """Memoized accepted frame for a client, plus its data version
+    
+    New rows (or deletes) in either table change the version and so the frame.
+    The session keeps its recent frames, so reruns skip even the copy
+    st.cache_data hands out; other sessions share the process-level entry.
+    """
+    version = get_data_version(client_name)
+    df = session_memo('accepted_memo', (client_name, version),
+                      lambda: load_accepted_frame(client_name, version))
+    return df, version
+
+def get_connection_filter(client_name, data_version, df):
+    """Session's compiled filter for an accepted frame (rebuilt with the frame)"""
+    return session_memo('accepted_filter', (client_name, data_version),
+                        lambda: ConnectionFilter(df))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_clients():
+    """Distinct clients with connections in ProfilesX"""
+    conn = get_db_connection()
     try:
-        conn = get_db_connection()
-        query = "SELECT * FROM InvitedProfiles"
-        df = pd.read_sql(query, conn)
+        df = pd.read_sql("SELECT DISTINCT Client FROM ProfilesX WHERE Client IS NOT NULL ORDER BY Client", conn)
+        return df['Client'].tolist()
+    finally:
         conn.close()
-        return df
-    except Exception as e:
-        st.error(f"❌ Error loading invited profiles: {str(e)}")
-        return pd.DataFrame()
 
-def make_clickable_link(val):
-    """Create clickable URL link"""
-    if pd.isna(val) or val == '':
-        return ''
-    return f'<a target="_blank" href="{val}">🔗 Open</a>'
+@st.cache_data(ttl=300, show_spinner=False)
+def get_client_categories(client_name):
+    """Distinct invite categories for one client"""
+    conn = get_db_connection()
+    try:
+        df = pd.read_sql(
+            "SELECT DISTINCT Category FROM InvitedProfiles WHERE ClientName = %s AND Category IS NOT NULL ORDER BY Category",
+            conn, params=(client_name,)
+        )
+        return df['Category'].tolist()
+    finally:
+        conn.close()
+
+def get_sample_names(client_name, limit=5):
+    """A few invited and connected names for one client (debugging a missing match)"""
+    conn = get_db_connection()
+    try:
+        invited = pd.read_sql(
+            f"SELECT TOP ({int(limit)}) FullName AS Name FROM InvitedProfiles WHERE ClientName = %s",
+            conn, params=(client_name,)
+        )
+        connected = pd.read_sql(
+            f"SELECT TOP ({int(limit)}) Name FROM ProfilesX WHERE Client = %s",
+            conn, params=(client_name,)
+        )
+        return invited, connected
+    finally:
+        conn.close()
+
+CONNECTION_PAGE_SIZES = [25, 50, 100, 250]
+
+def render_connections_table(df_display, filter_key):
+    """Paginated table of connections with link columns (only the visible page is sent)
+    
+    filter_key identifies the filters behind df_display; when it changes the
+    page goes back to 1.
+    """
+    if df_display.empty:
+        st.info("No connections found matching your criteria.")
+        return
+    
+    size_col, page_col, _ = st.columns([1, 1, 2])
+    with size_col:
+        page_size = st.selectbox("Connections per page", CONNECTION_PAGE_SIZES, index=1)
+    page_count = max(1, -(-len(df_display) // page_size))
+    if st.session_state.get('connections_page_filters') != (filter_key, page_size):
+        st.session_state['connections_page_filters'] = (filter_key, page_size)
+        st.session_state['connections_page'] = 1
+    with page_col:
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count,
+                               key='connections_page')
+    
+    start = (page - 1) * page_size
+    st.dataframe(
+        df_display.iloc[start:start + page_size],
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'Profile URL': st.column_config.LinkColumn("Profile URL", help="Open the LinkedIn profile"),
+            'Posts URL': st.column_config.LinkColumn("Posts URL", help="Open their recent LinkedIn activity"),
+            'Invited On': st.column_config.DateColumn("Invited On"),
+            'Connected On (Approx)': st.column_config.DateColumn("Connected On (Approx)"),
+        }
+    )
+    st.caption(f"Showing connections {start + 1}-{min(start + page_size, len(df_display))} of {len(df_display)}")
 
 # --- Saved Searches Database Functions ---
 def get_saved_searches(conn):
@@ -135,17 +312,11 @@ def test_database_connection():
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-        
-        # Test both tables
-        cursor.execute("SELECT COUNT(*) FROM ProfilesX")
-        connections_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM InvitedProfiles")
-        invited_count = cursor.fetchone()[0]
-        
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
         conn.close()
         
-        st.success(f"✅ Database connected! ProfilesX: {connections_count:,}, InvitedProfiles: {invited_count:,}")
+        st.success("✅ Database connected!")
         return True
     except Exception as e:
         st.error(f"❌ Database connection failed: {str(e)}")
@@ -170,6 +341,7 @@ def main():
     # Show configuration
     with st.expander("Current Configuration"):
         st.text(f"Database: {database} on {server}")
+        st.text(describe_pool())
         st.text(f"Data: ProfilesX + InvitedProfiles [DB]")
     
     # Test database connection
@@ -178,87 +350,36 @@ def main():
         st.error("Cannot proceed without database connection.")
         return
     
-    # Load data from database
-    with st.spinner("Loading data from database..."):
-        df_connections = get_all_connections()
-        df_invited = get_invited_profiles()
-    
-    if df_connections.empty or df_invited.empty:
+    # Client selection
+    try:
+        unique_clients = get_clients()
+    except Exception as e:
+        st.error(f"❌ Error loading clients: {str(e)}")
+        return
+    if not unique_clients:
         st.error("Unable to load data from database. Please check connection.")
         return
-    
-    # Prepare invited profiles data (column mapping from Google Sheets to Database)
-    df_invited_clean = df_invited.copy()
-    df_invited_clean.rename(columns={'FullName': 'Name'}, inplace=True)
-    
-    # Create Posts URL for LinkedIn activity
-    df_invited_clean['Posts_URL'] = df_invited_clean['ProfileURL'].apply(
-        lambda x: f"{x}/recent-activity/all/" if pd.notna(x) and x != '' else ''
-    )
-    
-    # Client selection
-    unique_clients = sorted(df_connections['Client'].unique())
     client_name = st.selectbox("🏢 Select Client", unique_clients)
     
     # Show client summary
-    client_connections = df_connections[df_connections['Client'] == client_name]
-    client_invited = df_invited_clean[df_invited_clean['ClientName'] == client_name]
-    
-    # Define unique_categories here, after client_invited is available
-    if not client_invited.empty:
-        unique_categories = ["🌟 All Categories"] + sorted(
-            client_invited['Category'].dropna().unique()
-        )
-    else:
-        unique_categories = ["🌟 All Categories"] # Default if no invited profiles for client
-    
+    try:
+        with st.spinner("Loading accepted connections..."):
+            df_accepted, data_version = get_accepted_frame(client_name)
+    except Exception as e:
+        st.error(f"❌ Error loading accepted connections: {str(e)}")
+        return
+    accepted_client = client_name
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("👥 Total Connections", len(client_connections))
+        st.metric("👥 Total Connections", data_version[0])
     with col2:
-        st.metric("📧 Total Invited", len(client_invited))
+        st.metric("📧 Total Invited", data_version[2])
     with col3:
-        # Calculate accepted (people who were invited AND are now connected)
-        accepted = pd.merge(client_invited, client_connections[['Name']], on='Name', how='inner')
-        st.metric("✅ Accepted", len(accepted))
-    
-    
-
-    # Merge to find accepted connections (people invited who are now connected)
-    df_accepted = pd.merge(
-        client_invited, 
-        client_connections[['Name', 'ProfileDate']], 
-        on='Name', 
-        how='inner'
-    )
-    
-    if df_accepted.empty:
-        st.info("No accepted connections found for this client.")
-        st.info("This means none of the people you invited have accepted yet, or there's a data mismatch.")
-        
-        # Show debugging info
-        with st.expander("🔍 Debugging Information"):
-            st.write("**Sample Invited Names:**")
-            st.dataframe(client_invited[['Name']].head(), use_container_width=True)
-            st.write("**Sample Connection Names:**")
-            st.dataframe(client_connections[['Name']].head(), use_container_width=True)
-        
-        return
-    
-    # Prepare display data (column mapping)
-    df_display = df_accepted[[
-        "Name", "Title", "Organization1", "ProfileURL", "Posts_URL", 
-        "Followers", "Category", "DateCollected", "ProfileDate"
-    ]].copy()
-    
-    # Rename columns for better display
-    df_display.rename(columns={
-        "Organization1": "Organization",
-        "Posts_URL": "Posts URL",
-        "DateCollected": "Invited On",
-        "ProfileDate": "Connected On (Approx)",
-        "ProfileURL": "Profile URL"
-    }, inplace=True)
+        # Accepted = people who were invited AND are now connected
+        st.metric("✅ Accepted", len(df_accepted))
+    if st.button("🔄 Check for new data"):
+        get_data_version.clear()
+        st.rerun()
 
     # --- Saved Searches ---
     st.subheader("Saved Searches")
@@ -273,7 +394,7 @@ def main():
         selected_search_data = saved_searches_df[saved_searches_df['SearchName'] == selected_saved_search_name].iloc[0]
         
         # Populate session state with loaded values
-        st.session_state['selected_categories'] = selected_search_data['Categories'].split(',') if selected_search_data['Categories'] else ["🌟 All Categories"]
+        st.session_state['selected_categories'] = selected_search_data['Categories'].split(',') if selected_search_data['Categories'] else [ALL_CATEGORIES]
         st.session_state['title_include_keywords'] = selected_search_data['TitleIncludeKeywords'] if pd.notna(selected_search_data['TitleIncludeKeywords']) else ""
         st.session_state['title_exclude_keywords'] = selected_search_data['TitleExcludeKeywords'] if pd.notna(selected_search_data['TitleExcludeKeywords']) else ""
         st.session_state['org_filter'] = selected_search_data['OrganizationFilter'] if pd.notna(selected_search_data['OrganizationFilter']) else ""
@@ -301,7 +422,7 @@ def main():
 
     # Initialize session state for filters if not already present
     if 'selected_categories' not in st.session_state:
-        st.session_state['selected_categories'] = ["🌟 All Categories"]
+        st.session_state['selected_categories'] = [ALL_CATEGORIES]
     if 'title_include_keywords' not in st.session_state:
         st.session_state['title_include_keywords'] = ""
     if 'title_exclude_keywords' not in st.session_state:
@@ -339,24 +460,18 @@ def main():
     )
     
     # Update client-specific data based on current selection
-    client_connections = df_connections[df_connections['Client'] == client_name]
-    client_invited = df_invited_clean[df_invited_clean['ClientName'] == client_name]
-    
-    # Update categories for current client
-    if not client_invited.empty:
-        unique_categories = ["🌟 All Categories"] + sorted(
-            client_invited['Category'].dropna().unique()
-        )
-    else:
-        unique_categories = ["🌟 All Categories"]
+    if client_name != accepted_client:
+        try:
+            df_accepted, data_version = get_accepted_frame(client_name)
+        except Exception as e:
+            st.error(f"❌ Error loading accepted connections: {str(e)}")
+            return
     
-    # Merge to find accepted connections (people invited who are now connected)
-    df_accepted = pd.merge(
-        client_invited, 
-        client_connections[['Name', 'ProfileDate']], 
-        on='Name', 
-        how='inner'
-    )
+    try:
+        unique_categories = [ALL_CATEGORIES] + get_client_categories(client_name)
+    except Exception as e:
+        st.error(f"❌ Error loading categories: {str(e)}")
+        unique_categories = [ALL_CATEGORIES]
     
     if df_accepted.empty:
         st.info("No accepted connections found for this client.")
@@ -364,34 +479,24 @@ def main():
         
         # Show debugging info
         with st.expander("🔍 Debugging Information"):
+            try:
+                invited_names, connection_names = get_sample_names(client_name)
+            except Exception as e:
+                st.error(f"❌ Error loading sample names: {str(e)}")
+                invited_names = connection_names = pd.DataFrame()
             st.write("**Sample Invited Names:**")
-            if not client_invited.empty:
-                st.dataframe(client_invited[['Name']].head(), use_container_width=True)
+            if not invited_names.empty:
+                st.dataframe(invited_names, use_container_width=True)
             else:
                 st.write("No invited profiles for this client")
             st.write("**Sample Connection Names:**")
-            if not client_connections.empty:
-                st.dataframe(client_connections[['Name']].head(), use_container_width=True)
+            if not connection_names.empty:
+                st.dataframe(connection_names, use_container_width=True)
             else:
                 st.write("No connections for this client")
         
         return
     
-    # Prepare display data (column mapping)
-    df_display = df_accepted[[
-        "Name", "Title", "Organization1", "ProfileURL", "Posts_URL", 
-        "Followers", "Category", "DateCollected", "ProfileDate"
-    ]].copy()
-    
-    # Rename columns for better display
-    df_display.rename(columns={
-        "Organization1": "Organization",
-        "Posts_URL": "Posts URL",
-        "DateCollected": "Invited On",
-        "ProfileDate": "Connected On (Approx)",
-        "ProfileURL": "Profile URL"
-    }, inplace=True)
-
     # Category selection
     selected_categories = st.multiselect(
         "📂 Select Categories",
@@ -419,9 +524,7 @@ def main():
         with col_followers1:
             min_followers = st.number_input("Minimum Followers", min_value=0, value=st.session_state['min_followers'], key='min_followers')
         with col_followers2:
-            max_followers = st.number_input("Maximum Followers", min_value=0, value=st.session_state['max_followers'], key='max_followers')
-            if max_followers == 0: # If max is 0, treat as no upper limit
-                max_followers = df_display['Followers'].max() + 1 # Set to a value higher than any existing follower count
+            max_followers = st.number_input("Maximum Followers", min_value=0, value=st.session_state['max_followers'], key='max_followers', help="0 = no upper limit")
 
         # Date range filters
         st.markdown("---")
@@ -463,51 +566,26 @@ def main():
             st.warning("Please enter a name for the search.")
 
     # --- Apply Filters ---
+    # Cached per-predicate masks over the memoized frame; only changed widgets re-evaluate
+    connection_filter = get_connection_filter(client_name, data_version, df_accepted)
+    filter_args = dict(
+        # None only for "All Categories"; a cleared multiselect matches nothing
+        categories=[cat for cat in selected_categories if cat != ALL_CATEGORIES]
+                   if ALL_CATEGORIES not in selected_categories else None,
+        title_include=title_include_keywords,
+        title_exclude=title_exclude_keywords,
+        organization=org_filter,
+        min_followers=min_followers,
+        max_followers=max_followers,
+        invited_range=(invited_start, invited_end),
+        connected_range=(connected_start, connected_end)
+    )
+    df_display = connection_filter.apply(**filter_args)
+    # Identifies this result for the table's pager (any change goes back to page 1)
+    filter_key = hash((client_name, data_version, repr(sorted(filter_args.items()))))
+
+    # Most recent connections first: the memoized frame is already sorted and masks keep that order
 
-    # Category filter
-    if "🌟 All Categories" not in selected_categories:
-        df_display = df_display[df_display['Category'].isin(
-            [cat for cat in selected_categories if cat != "🌟 All Categories"]
-        )]
-
-    # Title include/exclude
-    if title_include_keywords:
-        include_patterns = [k.strip() for k in title_include_keywords.split(',') if k.strip()]
-        if include_patterns:
-            df_display = df_display[df_display['Title'].astype(str).str.contains('|'.join(include_patterns), case=False, na=False)]
-
-    if title_exclude_keywords:
-        exclude_patterns = [k.strip() for k in title_exclude_keywords.split(',') if k.strip()]
-        if exclude_patterns:
-            df_display = df_display[~df_display['Title'].astype(str).str.contains('|'.join(exclude_patterns), case=False, na=False)]
-
-    # Organization filter
-    if org_filter:
-        df_display = df_display[df_display['Organization'].astype(str).str.contains(org_filter, case=False, na=False)]
-
-    # Follower range filter
-    df_display = df_display[
-        (df_display['Followers'] >= min_followers) &
-        (df_display['Followers'] <= max_followers)
-    ]
-
-    # Ensure date columns are datetime objects before filtering
-    df_display['Connected On (Approx)'] = pd.to_datetime(df_display['Connected On (Approx)'])
-    df_display['Invited On'] = pd.to_datetime(df_display['Invited On'])
-
-    # Apply date filters
-    df_display = df_display[
-        (df_display['Connected On (Approx)'].dt.date >= connected_start) &
-        (df_display['Connected On (Approx)'].dt.date <= connected_end)
-    ]
-    df_display = df_display[
-        (df_display['Invited On'].dt.date >= invited_start) &
-        (df_display['Invited On'].dt.date <= invited_end)
-    ]
-
-    # Sort by most recent connections
-    df_display = df_display.sort_values(by='Connected On (Approx)', ascending=False)
-    
     # Display options
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -524,7 +602,7 @@ def main():
         st.subheader(f"📋 Recent Connections for {client_name}")
         
         # Show category breakdown
-        if len(selected_categories) > 1 or "🌟 All Categories" in selected_categories:
+        if len(selected_categories) > 1 or ALL_CATEGORIES in selected_categories:
             category_counts = df_display['Category'].value_counts()
             with st.expander(f"📊 Category Breakdown ({len(df_display)} total)"):
                 for category, count in category_counts.items():
@@ -543,53 +621,13 @@ def main():
                 mime="text/csv"
             )
         else:
-            # Enhanced display with clickable links
-            df_display_html = df_display.copy()
-            df_display_html['Profile URL'] = df_display_html['Profile URL'].apply(make_clickable_link)
-            df_display_html['Posts URL'] = df_display_html['Posts URL'].apply(make_clickable_link)
+            # Highlight count for recent connections (last 7 days)
+            recent_threshold = pd.Timestamp.now() - pd.Timedelta(days=7)
+            recent_count = (df_display['Connected On (Approx)'] > recent_threshold).sum()
+            if recent_count:
+                st.info(f"💡 {recent_count} connections from the last 7 days are at the top of the list")
             
-            # Custom styling
-            st.markdown("""
-            <style>
-            table {
-                width: 100%;
-                border-collapse: collapse;
-            }
-            th, td {
-                padding: 8px;
-                text-align: left;
-                border-bottom: 1px solid #ddd;
-                color: #333;
-            }
-            th {
-                background-color: #f2f2f2;
-                font-weight: bold;
-            }
-            tr:hover {
-                background-color: #e3f2fd !important;
-                color: #1565c0 !important;
-            }
-            tr:hover td {
-                color: #1565c0 !important;
-            }
-            .recent {
-                background-color: #e8f5e8;
-            }
-            </style>
-            """, unsafe_allow_html=True)
-            
-            # Highlight recent connections (last 7 days)
-            if 'Connected On (Approx)' in df_display_html.columns:
-                try:
-                    df_display_html['Connected On (Approx)'] = pd.to_datetime(df_display_html['Connected On (Approx)'])
-                    recent_threshold = pd.Timestamp.now() - pd.Timedelta(days=7)
-                    recent_mask = df_display_html['Connected On (Approx)'] > recent_threshold
-                    if recent_mask.any():
-                        st.info(f"💡 {recent_mask.sum()} connections from the last 7 days are highlighted below")
-                except:
-                    pass  # If date parsing fails, just display normally
-            
-            st.write(df_display_html.to_html(index=False, escape=False), unsafe_allow_html=True)
+            render_connections_table(df_display, filter_key)
             
             # Quick engagement tips
             with st.expander("💡 Engagement Tips"):
@@ -606,8 +644,6 @@ def main():
         with st.expander("📊 Engagement Statistics"):
             if 'Connected On (Approx)' in df_display.columns:
                 try:
-                    df_display['Connected On (Approx)'] = pd.to_datetime(df_display['Connected On (Approx)'])
-                    
                     # Connections by time period
                     now = pd.Timestamp.now()
                     last_7_days = (df_display['Connected On (Approx)'] > (now - pd.Timedelta(days=7))).sum()
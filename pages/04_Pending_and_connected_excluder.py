@@ -6,7 +6,9 @@
 
 import streamlit as st
 import pandas as pd
-import pymssql
+from data_access import get_db_connection, describe_pool, bulk_insert
+from linkedin_ids import canonicalize_linkedin_ids, linkedin_id_sql, has_linkedin_id_column
+from exclusion_cache import get_exclusion_cache
 import base64
 import re
 
@@ -36,89 +38,144 @@ except KeyError as e:
     st.stop()
 ################################################################
 
-def extract_linkedin_id(url):
-    """Extract LinkedIn username/ID from profile URL"""
-    if pd.isna(url) or not url:
-        return None
-    
-    # Convert to string and clean
-    url = str(url).strip()
-    
-    # Extract username from URLs like:
-    # https://www.linkedin.com/in/wilbertstaring/
-    # https://linkedin.com/in/wilbertstaring
-    # www.linkedin.com/in/wilbertstaring
-    match = re.search(r'linkedin\.com/in/([^/?#]+)', url)
-    if match:
-        linkedin_id = match.group(1).strip().lower()  # Normalize to lowercase
-        return linkedin_id
-    return None
+SERVER_SIDE_MODE = "🖥️ Server-side (send list IDs only)"
+CACHED_MODE = "⚡ Cached client sets (match in app)"
 
-def get_db_connection():
-    """Create database connection using pymssql"""
+def get_cached_exclusions(client_name):
+    """Get the client's connection/invite IDs and names from the in-process exclusion cache"""
     try:
-        conn = pymssql.connect(
-            server=server,
-            user=username,
-            password=password,
-            database=database,
-            timeout=30,
-            login_timeout=60
+        cache = get_exclusion_cache()
+        entry = cache.get(client_name)
+        
+        # Show cache state
+        stats = cache.stats()
+        st.sidebar.metric("Cached Clients", f"{stats['clients']} ({stats['size_mb']:.1f}/{stats['budget_mb']:.0f} MB)")
+        st.sidebar.caption(
+            f"Builds: {stats['builds']} · Delta refreshes: {stats['delta_refreshes']} · "
+            f"Hits: {stats['hits']} · Evictions: {stats['evictions']}"
         )
-        return conn
+        
+        return {
+            'connection_ids': entry.ids['connections'],
+            'invited_ids': entry.ids['invited'],
+            'connection_names': entry.names['connections'],
+            'invited_names': entry.names['invited']
+        }
     except Exception as e:
-        raise Exception(f"Database connection failed: {str(e)}")
+        st.error(f"❌ Error loading exclusion sets: {str(e)}")
+        return None
 
-def get_all_connections():
-    """Get all connections from ProfilesX table with LinkedIn IDs"""
+def get_client_summary():
+    """Get per-client connection and invite counts (aggregated on the server)"""
     try:
         conn = get_db_connection()
-        query = "SELECT * FROM ProfilesX"
+        query = """
+        SELECT ClientName, SUM(Connections) AS Connections, SUM(Invited) AS Invited
+        FROM (
+            SELECT Client AS ClientName, COUNT(*) AS Connections, 0 AS Invited
+            FROM ProfilesX
+            GROUP BY Client
+            UNION ALL
+            SELECT ClientName, 0, COUNT(*)
+            FROM InvitedProfiles
+            GROUP BY ClientName
+        ) counts
+        WHERE ClientName IS NOT NULL
+        GROUP BY ClientName
+        ORDER BY ClientName
+        """
         df = pd.read_sql(query, conn)
         conn.close()
-        
-        # Extract LinkedIn IDs from ProfilePermaLink
-        df['linkedin_id'] = df['ProfilePermaLink'].apply(extract_linkedin_id)
-        
-        # Show how many IDs were extracted
-        valid_ids = df['linkedin_id'].notna().sum()
-        st.sidebar.metric("Valid Connection IDs", f"{valid_ids:,}/{len(df):,}")
-        
         return df
     except Exception as e:
-        st.error(f"❌ Error loading connections: {str(e)}")
+        st.error(f"❌ Error loading client summary: {str(e)}")
         return pd.DataFrame()
 
-def get_invited_profiles():
-    """Get all invited profiles from InvitedProfiles table with LinkedIn IDs"""
+def id_match_sql(conn, table, alias, url_column):
+    """Condition matching a table row's LinkedIn ID to g.value
+    
+    Uses the stored LinkedInId (deriving it from the URL for rows not backfilled
+    yet), or derives every ID from the URL if the migration hasn't been run.
+    """
+    derived = linkedin_id_sql(f"{alias}.{url_column}")
+    if not has_linkedin_id_column(conn, table):
+        return f"{derived} = g.value"
+    return f"({alias}.LinkedInId = g.value OR ({alias}.LinkedInId IS NULL AND {derived} = g.value))"
+
+def match_growth_list_server_side(growth_list, client_name):
+    """Match the growth list against ProfilesX and InvitedProfiles on the server
+    
+    Only the upload's LinkedIn IDs (and names of rows without an ID) are sent to a
+    temp table and joined against the client's rows, so the result is sized to the
+    upload. ID matches seek the (client, LinkedInId) index; rows not yet backfilled
+    fall back to deriving the ID from the stored URL. Returns the matched IDs and
+    names per source table.
+    """
+    ids = set(growth_list['linkedin_id'].dropna())
+    names = set()
+    if 'Full name' in growth_list.columns:
+        names = set(growth_list.loc[growth_list['linkedin_id'].isna(), 'Full name'].dropna().astype(str))
+    
+    keys = [('id', value) for value in ids] + [('name', value) for value in names]
+    matches = {
+        'invited_ids': set(),
+        'connection_ids': set(),
+        'invited_names': set(),
+        'connection_names': set()
+    }
+    if not keys:
+        return matches
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
     try:
-        conn = get_db_connection()
-        query = "SELECT * FROM InvitedProfiles"
-        df = pd.read_sql(query, conn)
-        conn.close()
-        
-        # Extract LinkedIn IDs if ProfileURL column exists
-        if 'ProfileURL' in df.columns:
-            df['linkedin_id'] = df['ProfileURL'].apply(extract_linkedin_id)
-        elif 'ProfileUrl' in df.columns:
-            df['linkedin_id'] = df['ProfileUrl'].apply(extract_linkedin_id)
-        else:
-            # Fallback: Try to find any column with URLs
-            url_columns = [col for col in df.columns if 'url' in col.lower() or 'link' in col.lower()]
-            if url_columns:
-                df['linkedin_id'] = df[url_columns[0]].apply(extract_linkedin_id)
-            else:
-                st.warning("⚠️ No profile URL column found in InvitedProfiles table")
-                df['linkedin_id'] = None
-        
-        # Show how many IDs were extracted
-        valid_ids = df['linkedin_id'].notna().sum()
-        st.sidebar.metric("Valid Invited IDs", f"{valid_ids:,}/{len(df):,}")
+        cursor.execute("IF OBJECT_ID('tempdb..#growth_keys') IS NOT NULL DROP TABLE #growth_keys")
+        # tempdb's collation can differ from the database's; match the tables we join against
+        cursor.execute("CREATE TABLE #growth_keys (kind VARCHAR(4) NOT NULL, "
+                       "value NVARCHAR(400) COLLATE DATABASE_DEFAULT NOT NULL)")
+        _, errors = bulk_insert(conn, "#growth_keys", ["kind", "value"], list(enumerate(keys)))
+        if errors:
+            raise Exception(f"Could not upload {len(errors)} growth list keys: {errors[0][1]}")
+        cursor.execute("CREATE INDEX ix_growth_keys ON #growth_keys (kind, value)")
         
-        return df
-    except Exception as e:
-        st.error(f"❌ Error loading invited profiles: {str(e)}")
-        return pd.DataFrame()
+        invited_id_match = id_match_sql(conn, "InvitedProfiles", "i", "ProfileURL")
+        connection_id_match = id_match_sql(conn, "ProfilesX", "p", "ProfilePermaLink")
+        query = f"""
+        SELECT 'invited_ids', g.value FROM #growth_keys g
+        WHERE g.kind = 'id' AND EXISTS (
+            SELECT 1 FROM InvitedProfiles i
+            WHERE i.ClientName = %(client)s
+              AND {invited_id_match})
+        UNION ALL
+        SELECT 'connection_ids', g.value FROM #growth_keys g
+        WHERE g.kind = 'id' AND EXISTS (
+            SELECT 1 FROM ProfilesX p
+            WHERE p.Client = %(client)s
+              AND {connection_id_match})
+        UNION ALL
+        SELECT 'invited_names', g.value FROM #growth_keys g
+        WHERE g.kind = 'name' AND EXISTS (
+            SELECT 1 FROM InvitedProfiles i
+            WHERE i.ClientName = %(client)s AND i.FullName = g.value)
+        UNION ALL
+        SELECT 'connection_names', g.value FROM #growth_keys g
+        WHERE g.kind = 'name' AND EXISTS (
+            SELECT 1 FROM ProfilesX p
+            WHERE p.Client = %(client)s AND p.Name = g.value)
+        """
+        cursor.execute(query, {'client': client_name})
+        for source, value in cursor.fetchall():
+            matches[source].add(value)
+    finally:
+        # Temp tables live as long as the pooled connection, so always clean up
+        try:
+            cursor.execute("IF OBJECT_ID('tempdb..#growth_keys') IS NOT NULL DROP TABLE #growth_keys")
+            conn.commit()
+        except Exception:
+            pass
+        conn.close()
+    
+    return matches
 
 def read_uploaded_file(uploaded_file):
     """Read CSV or Excel file and return DataFrame"""
@@ -196,6 +253,7 @@ def app():
     # Show configuration
     with st.expander("🔧 Current Configuration"):
         st.text(f"Database: {database} on {server}")
+        st.text(describe_pool())
         st.text(f"Tables: ProfilesX (connections) + InvitedProfiles (invites)")
         st.text(f"Matching Method: LinkedIn Profile IDs (from URLs)")
     
@@ -205,12 +263,20 @@ def app():
         st.error("Cannot proceed without database connection.")
         return
     
-    # Load data from database
-    with st.spinner("Loading data from database..."):
-        df_connections = get_all_connections()
-        df_invited = get_invited_profiles()
+    # Matching mode
+    matching_mode = st.radio(
+        "⚙️ Matching Mode",
+        [SERVER_SIDE_MODE, CACHED_MODE],
+        horizontal=True,
+        help="Server-side sends only your list's LinkedIn IDs to the database. Cached mode keeps each client's IDs in memory and only pulls new rows."
+    )
+    server_side = matching_mode == SERVER_SIDE_MODE
+    
+    # Load per-client counts only
+    with st.spinner("Loading client summary from database..."):
+        client_summary = get_client_summary()
     
-    if df_connections.empty or df_invited.empty:
+    if client_summary.empty:
         st.error("Unable to load data from database. Please check connection.")
         return
     
@@ -218,30 +284,26 @@ def app():
     st.subheader("📊 Database Summary")
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Total Connections", len(df_connections))
+        st.metric("Total Connections", int(client_summary['Connections'].sum()))
     with col2:
-        st.metric("Total Invited", len(df_invited))
+        st.metric("Total Invited", int(client_summary['Invited'].sum()))
     with col3:
-        st.metric("Unique Clients", df_connections['Client'].nunique())
+        st.metric("Unique Clients", int((client_summary['Connections'] > 0).sum()))
     
     # Client selection
-    unique_clients_connections = df_connections['Client'].unique()
-    unique_clients_invited = df_invited['ClientName'].unique()
-    
-    # Combine and sort unique client names
-    all_clients = sorted(list(set(list(unique_clients_connections) + list(unique_clients_invited))))
-    
+    all_clients = client_summary['ClientName'].tolist()
     client_name = st.selectbox('🏢 Select Client', all_clients)
     
     # Show client-specific stats
-    client_connections = df_connections[df_connections['Client'] == client_name]
-    client_invited = df_invited[df_invited['ClientName'] == client_name]
+    client_row = client_summary[client_summary['ClientName'] == client_name].iloc[0]
+    client_connections_count = int(client_row['Connections'])
+    client_invited_count = int(client_row['Invited'])
     
     col1, col2 = st.columns(2)
     with col1:
-        st.info(f"{client_name} - Connections: {len(client_connections):,}")
+        st.info(f"{client_name} - Connections: {client_connections_count:,}")
     with col2:
-        st.info(f"{client_name} - Invited: {len(client_invited):,}")
+        st.info(f"{client_name} - Invited: {client_invited_count:,}")
     
     # File uploader - NOW SUPPORTS EXCEL
     st.subheader("📂 Upload Growth List to Filter")
@@ -268,7 +330,7 @@ def app():
         st.success(f"✅ Growth list loaded: {len(growth_list):,} rows")
         
         # Extract LinkedIn IDs from growth list
-        growth_list['linkedin_id'] = growth_list['Profile url'].apply(extract_linkedin_id)
+        growth_list['linkedin_id'] = canonicalize_linkedin_ids(growth_list['Profile url'])
         
         # Show LinkedIn ID extraction stats
         valid_ids = growth_list['linkedin_id'].notna().sum()
@@ -280,17 +342,34 @@ def app():
             st.dataframe(growth_list[['Profile url']].head(5))
             return
         
-        # Filter data for selected client
-        df_connections_client = df_connections[df_connections['Client'] == client_name]
-        df_invited_client = df_invited[df_invited['ClientName'] == client_name]
+        if server_side:
+            # Only IDs/names from this upload that exist in the database come back
+            try:
+                with st.spinner("Matching growth list against the database..."):
+                    matches = match_growth_list_server_side(growth_list, client_name)
+            except Exception as e:
+                st.error(f"❌ Server-side matching failed: {str(e)}")
+                st.info("💡 Switch to 'Cached client sets' mode to match in the app instead.")
+                return
+        else:
+            # Built once per client, then refreshed with new rows only
+            with st.spinner("Loading client exclusion sets..."):
+                matches = get_cached_exclusions(client_name)
+            if matches is None:
+                return
         
-        # Get LinkedIn IDs to exclude
-        connection_ids = set(df_connections_client['linkedin_id'].dropna())
-        invited_ids = set(df_invited_client['linkedin_id'].dropna())
+        connection_ids = matches['connection_ids']
+        invited_ids = matches['invited_ids']
+        invited_names = matches['invited_names']
+        connection_names = matches['connection_names']
         
         st.sidebar.write(f"**{client_name} Stats:**")
-        st.sidebar.write(f"Connection IDs: {len(connection_ids)}")
-        st.sidebar.write(f"Invited IDs: {len(invited_ids)}")
+        if server_side:
+            st.sidebar.write(f"Matched connection IDs: {len(connection_ids)}")
+            st.sidebar.write(f"Matched invited IDs: {len(invited_ids)}")
+        else:
+            st.sidebar.write(f"Connection IDs: {len(connection_ids)}")
+            st.sidebar.write(f"Invited IDs: {len(invited_ids)}")
         
         # Create filtered growth list
         growth_list_filtered = growth_list.copy()
@@ -313,10 +392,6 @@ def app():
         
         # Also do fallback name matching for any entries without LinkedIn IDs
         if 'Full name' in growth_list.columns:
-            # Get names for fallback matching
-            invited_names = set(df_invited_client['FullName'].dropna())
-            connection_names = set(df_connections_client['Name'].dropna())
-            
             # Filter entries without LinkedIn IDs by name
             no_id_mask = growth_list_filtered['linkedin_id'].isna()
             if no_id_mask.any():
@@ -5,8 +5,13 @@
 
 import streamlit as st
 import pandas as pd
-import pymssql
-from datetime import datetime
+from data_access import get_db_connection, describe_pool
+from datetime import datetime, timedelta
+import glob
+import gzip
+import os
+import tempfile
+import time
 
 ### STREAMLIT SECRETS CONFIGURATION ###################################
 # This app is configured to use Streamlit secrets.
@@ -39,104 +44,539 @@ except KeyError as e:
     st.stop()
 ################################################################
 
-def get_db_connection():
-    """Create database connection using pymssql"""
-    try:
-        conn = pymssql.connect(
-            server=server,
-            user=username,
-            password=password,
-            database=database,
-            timeout=30,
-            login_timeout=60
-        )
-        return conn
-    except Exception as e:
-        raise Exception(f"Database connection failed: {str(e)}")
+VIEW_COLUMNS = [
+    "ClientName", "FullName", "Title", "Location", "Organization1", "Followers",
+    "DateCollected", "Category", "GroupName", "CreatedAt", "UpdatedAt", "ProfileURL",
+]
+# Keyset order (all DESC). Rows logged in one upload share DateCollected and
+# CreatedAt, so ClientName + ProfileURL break ties to make every position unique.
+# Backed by the indexes in migrate_invited_profiles_indexes.py.
+KEYSET_COLUMNS = ["DateCollected", "CreatedAt", "ClientName", "ProfileURL"]
+
+def escape_like(term):
+    """Escape LIKE wildcards so a search term matches literally"""
+    return term.replace('[', '[[]').replace('%', '[%]').replace('_', '[_]')
+
+def build_filters(client=None, category=None, date_from=None, date_to=None, search=None):
+    """WHERE clauses + params for the viewer's server-side filters (sargable date range)"""
+    clauses, params = [], []
+    if client:
+        clauses.append("ClientName = %s")
+        params.append(client)
+    if category:
+        clauses.append("Category = %s")
+        params.append(category)
+    if date_from:
+        clauses.append("DateCollected >= %s")
+        params.append(date_from)
+    if date_to:
+        clauses.append("DateCollected < %s")
+        params.append(date_to + timedelta(days=1))
+    if search:
+        term = f"%{escape_like(search.strip())}%"
+        clauses.append("(FullName LIKE %s OR Title LIKE %s)")
+        params.extend([term, term])
+    return clauses, params
+
+def keyset_clause(after):
+    """Rows strictly after a keyset position in DESC order, as an expanded tuple comparison
+    
+    Key columns are nullable and SQL Server sorts NULLs last in DESC order, so the
+    comparisons are NULL-aware: after a value come smaller values and then NULLs,
+    nothing comes after a NULL, and a NULL only equals another NULL. Written on the
+    raw columns (not COALESCE) so the keyset indexes still serve the ORDER BY.
+    """
+    def equals(column, value):
+        return (f"{column} IS NULL", []) if value is None else (f"{column} = %s", [value])
+    
+    parts, params = [], []
+    for i, column in enumerate(KEYSET_COLUMNS):
+        if after[i] is None:
+            continue  # no row sorts after NULL on this column
+        conditions, branch_params = [], []
+        for previous, value in zip(KEYSET_COLUMNS[:i], after[:i]):
+            condition, condition_params = equals(previous, value)
+            conditions.append(condition)
+            branch_params.extend(condition_params)
+        conditions.append(f"({column} < %s OR {column} IS NULL)")
+        branch_params.append(after[i])
+        parts.append("(" + " AND ".join(conditions) + ")")
+        params.extend(branch_params)
+    if not parts:
+        return "1 = 0", []
+    return "(" + " OR ".join(parts) + ")", params
 
-def get_recent_invited_profiles(limit=100):
-    """Get most recent InvitedProfiles records"""
+def get_invited_profiles_page(filters, page_size=100, after=None):
+    """One page of InvitedProfiles in keyset order; returns (df, has_more)"""
     try:
+        clauses, params = build_filters(**filters)
+        if after is not None:
+            clause, keyset_params = keyset_clause(after)
+            clauses.append(clause)
+            params.extend(keyset_params)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order_by = ", ".join(f"{column} DESC" for column in KEYSET_COLUMNS)
+        
         conn = get_db_connection()
+        # One extra row tells us whether there is a next page
         query = f"""
-        SELECT TOP {limit}
-            ClientName,
-            FullName,
-            Title,
-            Location,
-            Organization1,
-            Followers,
-            DateCollected,
-            Category,
-            GroupName,
-            CreatedAt,
-            UpdatedAt
-        FROM InvitedProfiles 
-        ORDER BY DateCollected DESC, CreatedAt DESC
+        SELECT TOP ({int(page_size) + 1}) {', '.join(VIEW_COLUMNS)}
+        FROM InvitedProfiles
+        {where}
+        ORDER BY {order_by}
         """
-        df = pd.read_sql(query, conn)
+        df = pd.read_sql(query, conn, params=tuple(params))
         conn.close()
-        return df
+        return df.iloc[:page_size], len(df) > page_size
     except Exception as e:
         st.error(f"❌ Error loading data: {str(e)}")
-        return pd.DataFrame()
+        return pd.DataFrame(), False
 
-def get_database_stats():
-    """Get database statistics"""
+def row_keyset(row):
+    """Keyset position of a fetched row, with pandas timestamps turned back into datetimes"""
+    return [
+        None if pd.isna(value) else value.to_pydatetime() if isinstance(value, pd.Timestamp) else value
+        for value in (row[column] for column in KEYSET_COLUMNS)
+    ]
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_filter_options():
+    """Distinct client and (client, category) values for the filter dropdowns"""
     try:
         conn = get_db_connection()
+        options = pd.read_sql(
+            "SELECT DISTINCT ClientName, Category FROM InvitedProfiles ORDER BY ClientName, Category", conn
+        )
+        conn.close()
+        return options
+    except Exception as e:
+        st.error(f"❌ Error loading filter options: {str(e)}")
+        return pd.DataFrame(columns=["ClientName", "Category"])
+
+STATS_TTL = 60  # seconds the statistics batch is shared across sessions
+
+# Metadata row count (no table scan). dm_db_partition_stats needs VIEW DATABASE
+# STATE; sys.partitions carries the same count for any user who can read the table.
+ROW_COUNT_QUERIES = [
+    """SELECT SUM(row_count) FROM sys.dm_db_partition_stats
+       WHERE object_id = OBJECT_ID('InvitedProfiles') AND index_id IN (0, 1)""",
+    """SELECT SUM(rows) FROM sys.partitions
+       WHERE object_id = OBJECT_ID('InvitedProfiles') AND index_id IN (0, 1)""",
+]
+
+def _stats_batch(row_count_query):
+    """One round trip: headline counts, then the per-client breakdown, as two result sets"""
+    return f"""
+    SELECT
+        ({row_count_query}) AS TotalRecords,
+        (SELECT COUNT(*) FROM InvitedProfiles
+         WHERE CreatedAt >= CAST(CAST(GETDATE() AS DATE) AS DATETIME)
+           AND CreatedAt < DATEADD(DAY, 1, CAST(CAST(GETDATE() AS DATE) AS DATETIME))) AS TodayRecords;
+    
+    SELECT
+        ClientName,
+        COUNT(*) AS Records,
+        COUNT(DISTINCT Category) AS Categories,
+        MIN(DateCollected) AS FirstInvite,
+        MAX(DateCollected) AS LastInvite
+    FROM InvitedProfiles
+    GROUP BY ClientName
+    ORDER BY COUNT(*) DESC;
+    """
+
+@st.cache_data(ttl=STATS_TTL, show_spinner=False)
+def fetch_database_stats():
+    """Statistics + per-client breakdown from a single batched query (cached, shared across sessions)"""
+    conn = get_db_connection()
+    try:
         cursor = conn.cursor()
-        
-        # Total records
-        cursor.execute("SELECT COUNT(*) FROM InvitedProfiles")
-        total_records = cursor.fetchone()[0]
-        
-        # Unique clients
-        cursor.execute("SELECT COUNT(DISTINCT ClientName) FROM InvitedProfiles")
-        unique_clients = cursor.fetchone()[0]
-        
-        # Records today
-        cursor.execute("""
-            SELECT COUNT(*) FROM InvitedProfiles 
-            WHERE CAST(CreatedAt AS DATE) = CAST(GETDATE() AS DATE)
-        """)
-        today_records = cursor.fetchone()[0]
-        
-        # Most active client
-        cursor.execute("""
-            SELECT TOP 1 ClientName, COUNT(*) as Count
-            FROM InvitedProfiles 
-            GROUP BY ClientName 
-            ORDER BY COUNT(*) DESC
-        """)
-        top_client_result = cursor.fetchone()
-        top_client = f"{top_client_result[0]} ({top_client_result[1]})" if top_client_result else "N/A"
-        
+        for attempt, row_count_query in enumerate(ROW_COUNT_QUERIES):
+            try:
+                cursor.execute(_stats_batch(row_count_query))
+                break
+            except Exception:
+                conn.rollback()
+                if attempt == len(ROW_COUNT_QUERIES) - 1:
+                    raise
+        total_records, today_records = cursor.fetchone()
+        cursor.nextset()
+        columns = [column[0] for column in cursor.description]
+        breakdown = pd.DataFrame(cursor.fetchall(), columns=columns)
+    finally:
         conn.close()
-        
-        return {
-            "total_records": total_records,
-            "unique_clients": unique_clients,
-            "today_records": today_records,
-            "top_client": top_client
-        }
+    
+    # GROUP BY puts rows without a ClientName in their own NULL group - not a client
+    named = breakdown[breakdown['ClientName'].notna()]
+    top_client = f"{named['ClientName'].iloc[0]} ({named['Records'].iloc[0]})" if not named.empty else "N/A"
+    return {
+        "total_records": int(total_records or 0),
+        "unique_clients": len(named),
+        "today_records": int(today_records or 0),
+        "top_client": top_client,
+        "client_breakdown": breakdown,
+        "fetched_at": datetime.now(),
+    }
+
+def get_database_stats():
+    """Get database statistics"""
+    try:
+        return fetch_database_stats()
     except Exception as e:
         st.error(f"❌ Error loading statistics: {str(e)}")
         return None
 
-def test_database_connection():
-    """Test database connection"""
+def test_database_connection(stats):
+    """Report the connection test from the (cached) statistics batch"""
+    if stats is None:
+        st.error("❌ Database connection failed - see the error above.")
+        return False
+    st.success(f"✅ Database connected! Found {stats['total_records']:,} total records.")
+    return True
+
+# --- Full export: stream the filtered result set to a file in chunks ---------
+EXPORT_CHUNK_ROWS = 10000
+EXPORT_FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "CSV (gzip)": (".csv.gz", "application/gzip"),
+    "Parquet": (".parquet", "application/octet-stream"),
+}
+TEXT_COLUMNS = [column for column in VIEW_COLUMNS
+                if column not in ("Followers", "DateCollected", "CreatedAt", "UpdatedAt")]
+EXPORT_PREFIX = "invited_profiles_"
+EXPORT_DOWNLOAD_MAX_MB = 200   # larger files stay on the server instead of going through the browser
+EXPORT_MAX_AGE = 6 * 3600      # seconds before an export file is treated as abandoned
+
+def sweep_stale_exports(max_age=EXPORT_MAX_AGE):
+    """Delete export temp files older than max_age (left behind by sessions that ended)"""
+    cutoff = time.time() - max_age
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), f"{EXPORT_PREFIX}*")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+@st.cache_resource
+def sweep_exports_at_startup():
+    """Run the stale-export sweep once per process"""
+    sweep_stale_exports()
+    return True
+
+def discard_export():
+    """Forget this session's export and delete its file"""
+    export = st.session_state.pop('viewer_export', None)
+    if export and os.path.exists(export["path"]):
+        os.remove(export["path"])
+
+def parquet_schema():
+    """Fixed Parquet schema so every chunk is written with the same column types (None without pyarrow)"""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+    types = {column: pa.string() for column in TEXT_COLUMNS}
+    types["Followers"] = pa.int64()
+    for column in ("DateCollected", "CreatedAt", "UpdatedAt"):
+        types[column] = pa.timestamp("ms")
+    return pa.schema([(column, types[column]) for column in VIEW_COLUMNS])
+
+def count_matching_rows(filters):
+    """Row count for the export progress bar"""
+    clauses, params = build_filters(**filters)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    conn = get_db_connection()
     try:
-        conn = get_db_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM InvitedProfiles")
-        count = cursor.fetchone()[0]
+        cursor.execute(f"SELECT COUNT(*) FROM InvitedProfiles {where}", tuple(params))
+        return cursor.fetchone()[0]
+    finally:
         conn.close()
-        st.success(f"✅ Database connected! Found {count:,} total records.")
-        return True
+
+def export_invited_profiles(filters, export_format, path, progress_callback=None):
+    """Write every row matching the filters to path, EXPORT_CHUNK_ROWS at a time
+    
+    Rows are pulled with fetchmany() as the server streams them, so only one
+    chunk is ever held in memory whatever the size of the table.
+    """
+    clauses, params = build_filters(**filters)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    order_by = ", ".join(f"{column} DESC" for column in KEYSET_COLUMNS)
+    
+    conn = get_db_connection()
+    writer = None
+    exported = 0
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT {', '.join(VIEW_COLUMNS)} FROM InvitedProfiles {where} ORDER BY {order_by}",
+            tuple(params)
+        )
+        
+        if export_format == "Parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            schema = parquet_schema()
+            writer = pq.ParquetWriter(path, schema, compression="snappy")
+        elif export_format == "CSV (gzip)":
+            writer = gzip.open(path, "wt", newline="", encoding="utf-8")
+        else:
+            writer = open(path, "w", newline="", encoding="utf-8")
+        
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+            if not rows:
+                break
+            chunk = pd.DataFrame(rows, columns=VIEW_COLUMNS)
+            if export_format == "Parquet":
+                for column in ("DateCollected", "CreatedAt", "UpdatedAt"):
+                    chunk[column] = pd.to_datetime(chunk[column], errors="coerce")
+                chunk["Followers"] = pd.to_numeric(chunk["Followers"], errors="coerce").astype("Int64")
+                for column in TEXT_COLUMNS:
+                    chunk[column] = chunk[column].astype("string")
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            else:
+                chunk.to_csv(writer, header=exported == 0, index=False)
+            exported += len(chunk)
+            if progress_callback:
+                progress_callback(exported)
+    finally:
+        if writer is not None:
+            writer.close()
+        conn.close()
+    return exported
+
+def render_full_export(filters):
+    """Full-result export controls: stream to a temp file, then offer it for download on request"""
+    sweep_exports_at_startup()
+    formats = [name for name in EXPORT_FORMATS if name != "Parquet" or parquet_schema() is not None]
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        export_format = st.radio("Export format", formats, horizontal=True)
+    with col2:
+        start_export = st.button("📦 Export all matching records", use_container_width=True)
+    
+    if start_export:
+        # Drop the previous export file before writing a new one
+        discard_export()
+        sweep_stale_exports()
+        
+        suffix, mime = EXPORT_FORMATS[export_format]
+        handle, path = tempfile.mkstemp(prefix=EXPORT_PREFIX, suffix=suffix)
+        os.close(handle)
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        try:
+            total = count_matching_rows(filters)
+            
+            def show_progress(exported):
+                progress_bar.progress(min(exported / total, 1.0) if total else 1.0)
+                status_text.text(f"Exported {exported:,} of {total:,} rows...")
+            
+            exported = export_invited_profiles(filters, export_format, path, progress_callback=show_progress)
+            st.session_state['viewer_export'] = {
+                "path": path,
+                "rows": exported,
+                "mime": mime,
+                "file_name": f"invited_profiles_export_{datetime.now().strftime('%Y%m%d_%H%M')}{suffix}",
+            }
+        except Exception as e:
+            os.remove(path)
+            st.error(f"❌ Export failed: {str(e)}")
+        finally:
+            progress_bar.empty()
+            status_text.empty()
+    
+    export = st.session_state.get('viewer_export')
+    if not export:
+        return
+    if not os.path.exists(export["path"]):
+        st.session_state.pop('viewer_export', None)
+        return
+    
+    size_mb = os.path.getsize(export["path"]) / (1024 * 1024)
+    st.success(f"✅ Export ready: {export['rows']:,} records ({size_mb:.1f} MB)")
+    if size_mb > EXPORT_DOWNLOAD_MAX_MB:
+        # Serving it would copy the whole file into Streamlit's in-memory media store
+        st.warning(f"⚠️ Exports over {EXPORT_DOWNLOAD_MAX_MB} MB are not served through the browser. "
+                   f"The file is on the server at {export['path']} (removed after "
+                   f"{EXPORT_MAX_AGE // 3600} hours). Narrow the filters or use gzip/Parquet for a smaller file.")
+        if st.button("🗑️ Discard export"):
+            discard_export()
+            st.rerun()
+        return
+    
+    # The file is only read into memory on the rerun where the operator asks for it;
+    # the next rerun no longer renders the button, so Streamlit releases the bytes
+    col1, col2 = st.columns(2)
+    with col1:
+        prepare = st.button("⬇️ Prepare download", use_container_width=True)
+    with col2:
+        if st.button("🗑️ Discard export", use_container_width=True):
+            discard_export()
+            st.rerun()
+    if prepare:
+        with open(export["path"], "rb") as export_file:
+            data = export_file.read()
+        st.download_button(
+            label=f"💾 Download {export['file_name']}",
+            data=data,
+            file_name=export["file_name"],
+            mime=export["mime"],
+            on_click=discard_export,
+            use_container_width=True
+        )
+
+# --- Live mode: poll only rows newer than the last seen CreatedAt ---------------
+LIVE_POLL_SECONDS = 30
+LIVE_WINDOW = 500   # newest rows kept in the live frame
+TODAY_START_SQL = "CAST(CAST(GETDATE() AS DATE) AS DATETIME)"  # sargable start of the server's day
+
+def _watermark_state(frame):
+    """Newest CreatedAt in a frame plus the rows sitting exactly on it"""
+    if frame.empty or frame['CreatedAt'].isna().all():
+        return None, set()
+    watermark = frame['CreatedAt'].max()
+    at_watermark = frame[frame['CreatedAt'] == watermark]
+    return watermark, set(zip(at_watermark['ClientName'], at_watermark['ProfileURL']))
+
+def _server_day(conn):
+    """Start of the DB server's current day - 'today' follows GETDATE(), not the app server's clock"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT CAST(GETDATE() AS DATE)")
+    return pd.Timestamp(cursor.fetchone()[0]).normalize()
+
+def seed_live_feed():
+    """Full counters (one GROUP BY) + the newest LIVE_WINDOW rows; done once per session per server day"""
+    conn = get_db_connection()
+    try:
+        today_start = _server_day(conn)
+        counts = pd.read_sql(f"""
+            SELECT ClientName, COUNT(*) AS Records,
+                   SUM(CASE WHEN CreatedAt >= {TODAY_START_SQL} THEN 1 ELSE 0 END) AS Today
+            FROM InvitedProfiles
+            GROUP BY ClientName
+        """, conn)
+        frame = pd.read_sql(f"""
+            SELECT TOP ({LIVE_WINDOW}) {', '.join(VIEW_COLUMNS)}
+            FROM InvitedProfiles
+            ORDER BY CreatedAt DESC
+        """, conn)
+        frame['CreatedAt'] = pd.to_datetime(frame['CreatedAt'])
+        watermark, seen = _watermark_state(frame)
+        if watermark is not None:
+            # An upload can put more rows on one CreatedAt than the window holds
+            at_watermark = pd.read_sql(
+                "SELECT ClientName, ProfileURL FROM InvitedProfiles WHERE CreatedAt = %s",
+                conn, params=(watermark.to_pydatetime(),)
+            )
+            seen = set(zip(at_watermark['ClientName'], at_watermark['ProfileURL']))
+    finally:
+        conn.close()
+    
+    return {
+        "frame": frame,
+        "watermark": watermark,
+        "seen_at_watermark": seen,
+        "client_counts": dict(zip(counts['ClientName'], counts['Records'].astype(int))),
+        "today_records": int(counts['Today'].sum()) if not counts.empty else 0,
+        "today_start": today_start,
+        "last_delta": 0,
+        "polls": 0,
+        "polled_at": datetime.now(),
+    }
+
+def poll_live_feed(feed):
+    """Fetch rows at/after the watermark, drop ones already seen and fold them into the counters"""
+    conn = get_db_connection()
+    try:
+        server_day = _server_day(conn)
+        if server_day != feed["today_start"]:
+            delta = None
+        elif feed["watermark"] is None:
+            delta = pd.read_sql(f"""
+                SELECT TOP ({LIVE_WINDOW}) {', '.join(VIEW_COLUMNS)}
+                FROM InvitedProfiles
+                ORDER BY CreatedAt DESC
+            """, conn)
+        else:
+            # >= so rows committed later with the same CreatedAt tick aren't missed
+            delta = pd.read_sql(f"""
+                SELECT {', '.join(VIEW_COLUMNS)}
+                FROM InvitedProfiles
+                WHERE CreatedAt >= %s
+                ORDER BY CreatedAt
+            """, conn, params=(pd.Timestamp(feed["watermark"]).to_pydatetime(),))
+    finally:
+        conn.close()
+    
+    if delta is None:
+        # The DB server's day rolled over: reseed so 'today' restarts at its midnight
+        return seed_live_feed()
+    
+    delta['CreatedAt'] = pd.to_datetime(delta['CreatedAt'])
+    if feed["seen_at_watermark"]:
+        already_seen = [
+            created_at == feed["watermark"] and (client, url) in feed["seen_at_watermark"]
+            for created_at, client, url in zip(delta['CreatedAt'], delta['ClientName'], delta['ProfileURL'])
+        ]
+        delta = delta[~pd.Series(already_seen, index=delta.index, dtype=bool)]
+    
+    feed["polls"] += 1
+    feed["polled_at"] = datetime.now()
+    feed["last_delta"] = len(delta)
+    if delta.empty:
+        return feed
+    
+    # Counters move by the delta only - nothing is recounted on the server
+    for client, count in delta['ClientName'].value_counts().items():
+        feed["client_counts"][client] = feed["client_counts"].get(client, 0) + int(count)
+    feed["today_records"] += int((delta['CreatedAt'] >= feed["today_start"]).sum())
+    
+    frame = pd.concat([delta, feed["frame"]], ignore_index=True)
+    feed["frame"] = frame.sort_values('CreatedAt', ascending=False).head(LIVE_WINDOW).reset_index(drop=True)
+    watermark, seen = _watermark_state(delta)
+    if watermark == feed["watermark"]:
+        seen |= feed["seen_at_watermark"]
+    feed["watermark"], feed["seen_at_watermark"] = watermark, seen
+    return feed
+
+def render_live_panel():
+    """Live counters + newest rows, refreshed from the CreatedAt delta"""
+    try:
+        feed = st.session_state.get('live_feed')
+        if feed is None:
+            # First poll of the session: seed the counters once (polls reseed on a new server day)
+            feed = seed_live_feed()
+        else:
+            feed = poll_live_feed(feed)
+        st.session_state['live_feed'] = feed
     except Exception as e:
-        st.error(f"❌ Database connection failed: {str(e)}")
-        return False
+        st.error(f"❌ Error polling for new records: {str(e)}")
+        return
+    
+    client_counts = feed["client_counts"]
+    named_counts = {client: count for client, count in client_counts.items() if pd.notna(client)}
+    top_client = max(named_counts.items(), key=lambda item: item[1]) if named_counts else None
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("📊 Total Records", f"{sum(client_counts.values()):,}", delta=feed["last_delta"] or None)
+    with col2:
+        st.metric("🏢 Unique Clients", len(named_counts))
+    with col3:
+        st.metric("📅 Today's Records", feed["today_records"])
+    with col4:
+        st.metric("🏆 Top Client", f"{top_client[0]} ({top_client[1]})" if top_client else "N/A")
+    
+    st.caption(
+        f"🟢 Live - last checked {feed['polled_at'].strftime('%H:%M:%S')}, "
+        f"{feed['last_delta']} new record(s), polling every {LIVE_POLL_SECONDS}s"
+    )
+    live_cols = ['ClientName', 'FullName', 'Title', 'Organization1', 'Category', 'DateCollected', 'CreatedAt']
+    st.dataframe(feed["frame"][live_cols], use_container_width=True, height=600, hide_index=True)
+
+# Fragments (Streamlit 1.33+) rerun just the live panel; older versions rerun the page
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+live_panel = _fragment(run_every=LIVE_POLL_SECONDS)(render_live_panel) if _fragment else render_live_panel
 
 def main():
     st.title("📊 Database Viewer V2")
@@ -155,18 +595,29 @@ def main():
     # Show configuration
     with st.expander("Current Configuration"):
         st.text(f"Database: {database} on {server}")
+        st.text(describe_pool())
         st.text(f"Table: InvitedProfiles [DB] (invite logging records)")
     
+    # Live mode skips everything below: each poll is one small CreatedAt-delta query
+    if st.toggle("🔴 Live mode (poll for new records every 30 seconds)", key="live_mode"):
+        live_panel()
+        if not _fragment:
+            time.sleep(LIVE_POLL_SECONDS)
+            st.rerun()
+        return
+    st.session_state.pop('live_feed', None)
+    
+    # Statistics and the connection test share one cached query batch
+    stats = get_database_stats()
+    
     # Test database connection
     st.subheader("Database Connection Test")
-    if not test_database_connection():
+    if not test_database_connection(stats):
         st.error("Cannot proceed without database connection.")
         return
     
     # Get and display database statistics
     st.subheader("Database Statistics")
-    stats = get_database_stats()
-    
     if stats:
         col1, col2, col3, col4 = st.columns(4)
         with col1:
@@ -177,30 +628,74 @@ def main():
             st.metric("📅 Today's Records", stats['today_records'])
         with col4:
             st.metric("🏆 Top Client", stats['top_client'])
+        st.caption(f"Statistics as of {stats['fetched_at'].strftime('%H:%M:%S')} (refreshed at most every {STATS_TTL}s)")
+    
+    # Server-side filters + keyset pagination: only one page is ever fetched
+    st.subheader("Browse Records")
+    options = get_filter_options()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        clients = sorted(options['ClientName'].dropna().unique())
+        client = st.selectbox("Client", ["All clients"] + clients)
+    with col2:
+        client_options = options if client == "All clients" else options[options['ClientName'] == client]
+        categories = sorted(client_options['Category'].dropna().unique())
+        category = st.selectbox("Category", ["All categories"] + categories)
+    with col3:
+        search = st.text_input("Search name or title", "")
     
-    # Records limit selection
-    st.subheader("Recent Records")
     col1, col2 = st.columns([2, 1])
     with col1:
+        date_range = st.date_input("Date collected (from - to)", value=())
+    with col2:
         record_limit = st.selectbox(
-            "Select number of records to display:",
+            "Records per page:",
             [50, 100, 200, 500, 1000],
             index=1  # Default to 100
         )
+    
+    filters = {
+        "client": None if client == "All clients" else client,
+        "category": None if category == "All categories" else category,
+        "date_from": date_range[0] if len(date_range) > 0 else None,
+        "date_to": date_range[1] if len(date_range) > 1 else None,
+        "search": search or None,
+    }
+    
+    # Page i starts after page_cursors[i] (None = newest); reset when the view changes
+    view_key = (tuple(filters.items()), record_limit)
+    if st.session_state.get('viewer_view_key') != view_key:
+        st.session_state['viewer_view_key'] = view_key
+        st.session_state['viewer_page_cursors'] = [None]
+    page_cursors = st.session_state['viewer_page_cursors']
+    
+    # Load and display the current page
+    with st.spinner(f"Loading {record_limit} records..."):
+        df, has_more = get_invited_profiles_page(filters, record_limit, after=page_cursors[-1])
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        if st.button("⏮️ Newest", use_container_width=True, disabled=len(page_cursors) == 1):
+            st.session_state['viewer_page_cursors'] = [None]
+            st.rerun()
     with col2:
+        if st.button("◀️ Previous", use_container_width=True, disabled=len(page_cursors) == 1):
+            page_cursors.pop()
+            st.rerun()
+    with col3:
+        if st.button("Next ▶️", use_container_width=True, disabled=not has_more):
+            page_cursors.append(row_keyset(df.iloc[-1]))
+            st.rerun()
+    with col4:
         if st.button("🔄 Refresh Data", use_container_width=True):
             st.rerun()
     
-    # Load and display recent records
-    with st.spinner(f"Loading last {record_limit} records..."):
-        df = get_recent_invited_profiles(record_limit)
-    
     if df.empty:
         st.warning("No records found in database.")
         return
     
     # Display results
-    st.success(f"✅ Loaded {len(df)} records")
+    st.success(f"✅ Page {len(page_cursors)}: {len(df)} records" + (" (more available)" if has_more else " (end of results)"))
     
     # Show data preview with key metrics
     col1, col2, col3 = st.columns(3)
@@ -251,18 +746,11 @@ def main():
         # Show raw dataframe
         st.dataframe(df, use_container_width=True, height=600)
     
-    # Client-specific breakdown
-    if not df.empty:
-        with st.expander(f"📊 Breakdown by Client (Last {record_limit} records)"):
-            client_breakdown = df.groupby('ClientName').agg({
-                'FullName': 'count',
-                'Category': 'nunique',
-                'DateCollected': ['min', 'max']
-            }).round(2)
-            
+    # Client-specific breakdown (computed by the server over the whole table)
+    if stats:
+        with st.expander("📊 Breakdown by Client (all records)"):
+            client_breakdown = stats['client_breakdown'].set_index('ClientName')
             client_breakdown.columns = ['Records', 'Categories', 'First Invite', 'Last Invite']
-            client_breakdown = client_breakdown.sort_values('Records', ascending=False)
-            
             st.dataframe(client_breakdown, use_container_width=True)
     
     # Download option
@@ -270,21 +758,18 @@ def main():
     if not df.empty:
         csv = df.to_csv(index=False)
         st.download_button(
-            label="📄 Download Recent Records as CSV",
+            label="📄 Download This Page as CSV",
             data=csv,
-            file_name=f"invited_profiles_recent_{record_limit}_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
+            file_name=f"invited_profiles_page{len(page_cursors)}_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
             mime="text/csv",
             use_container_width=True
         )
         
         st.info(f"💾 CSV will contain {len(df)} records with {len(df.columns)} columns")
     
-    # Auto-refresh option
-    st.subheader("🔄 Auto-Refresh")
-    if st.checkbox("Enable auto-refresh (30 seconds)"):
-        st.info("⏱️ Page will automatically refresh every 30 seconds")
-        # Note: In a real deployment, you'd implement auto-refresh with st.empty() and time.sleep()
-        # For now, this is just a UI placeholder
+    # Everything matching the current filters, not just this page
+    with st.expander("📦 Full export (all records matching the filters)"):
+        render_full_export(filters)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,410 @@
+# =============================================================================
+# FILE: sheet_inventory.py
+# PURPOSE: Growth-list sheet scanning for the list manager (READ ONLY)
+# =============================================================================
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import gspread
+import numpy as np
+import pygsheets
+import streamlit as st
+
+from google_quota import get_google_scheduler, is_retryable, MAX_RETRIES
+
+DEFAULT_MAX_WORKERS = 8
+
+# Column-targeted reads: sheets are read in groups, each group costing two HTTP
+# batch round trips (header + first column, then the Sent column) instead of
+# one full-grid download per sheet.
+COLUMN_READER = "columns"
+FULL_GRID_READER = "full_grid"
+BATCH_GROUP_SIZE = 20
+
+SHEET_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'sheet_metrics.sqlite')
+
+# httplib2 (under pygsheets/gspread) is not thread-safe, so each worker thread
+# authorizes its own clients once and reuses them for every sheet it reads.
+_thread_clients = threading.local()
+
+
+def _get_clients(creds):
+    """Per-thread (pygsheets, gspread) clients for these credentials"""
+    clients = getattr(_thread_clients, 'clients', None)
+    if clients is None or clients[0] is not creds:
+        clients = (creds, pygsheets.authorize(custom_credentials=creds), gspread.authorize(creds))
+        _thread_clients.clients = clients
+    return clients[1], clients[2]
+
+
+def _read_with_pygsheets(gc, sheet_id):
+    sheet = gc.open_by_key(sheet_id)
+    worksheet = sheet[0]
+    return worksheet.get_all_values()
+
+
+def _read_with_gspread(gc_gspread, sheet_id):
+    sheet_gspread = gc_gspread.open_by_key(sheet_id)
+    worksheet_gspread = sheet_gspread.sheet1
+    return worksheet_gspread.get_all_values()
+
+
+def _read_first_worksheet(scheduler, gc, gc_gspread, sheet_id):
+    """pygsheets read, falling back to gspread only for non-retryable errors"""
+    try:
+        # Method 1: pygsheets (usually works)
+        return _read_with_pygsheets(gc, sheet_id)
+    except Exception as e:
+        if is_retryable(e):
+            raise  # the scheduler backs off and retries the whole read
+        # Method 2: Direct API call with proper authentication (its two reads count against the quota too)
+        scheduler.throttle("sheets", 2)
+        return _read_with_gspread(gc_gspread, sheet_id)
+
+
+def read_sheet_values(creds, sheet_id):
+    """Read every cell of the first worksheet (pygsheets, falling back to gspread)
+
+    Both paths cost two Sheets reads (metadata + values) and run through the
+    shared quota scheduler. Retries happen only there: a 429/5xx retries the
+    whole read, so the fallback never runs a second backoff ladder.
+    """
+    gc, gc_gspread = _get_clients(creds)
+    scheduler = get_google_scheduler()
+    return scheduler.call("sheets", _read_first_worksheet, scheduler, gc, gc_gspread, sheet_id, cost=2)
+
+
+def empty_metrics():
+    """Zero metrics for failed or empty sheets"""
+    return {'length': 0, 'depleted': 0, 'rejected': 0, 'statuses': {}}
+
+
+def _metrics_from(length, sent_values=None):
+    """Metrics dict with a histogram of every distinct non-empty Sent value"""
+    statuses = Counter(sent_values or ())
+    statuses.pop('', None)
+    return {
+        'length': int(length),
+        'depleted': statuses.get("Depleted", 0),
+        'rejected': statuses.get("Rejected", 0),
+        'statuses': dict(statuses),
+    }
+
+
+def count_sheet_rows(all_values):
+    """Count non-empty rows and the Sent column's status histogram
+
+    The grid comes back ragged (trailing empty cells are dropped) and padding it
+    into a 2-D array costs more than the counting itself, so rows are tested with
+    a C-level map() and the Sent column is extracted once and counted in C.
+    """
+    if not all_values:
+        return empty_metrics()
+
+    header_row = all_values[0]
+    total_count = sum(map(any, all_values))
+
+    if "Sent" not in header_row:
+        # No "Sent" column, just count total rows
+        return _metrics_from(total_count)
+
+    sent_column_index = header_row.index("Sent")
+    return _metrics_from(total_count, [row[sent_column_index] for row in all_values[1:]
+                                       if len(row) > sent_column_index])
+
+
+def fetch_sheet_metrics(creds, sheet_id):
+    """Read one sheet and return its metrics, plus whether it had any content"""
+    all_values = read_sheet_values(creds, sheet_id)
+    return count_sheet_rows(all_values), bool(all_values)
+
+
+def column_letter(index):
+    """0-based column index to A1 column letters (0 -> A, 27 -> AB)"""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _flatten_column(value_range):
+    """Single-column ValueRange (ROWS major) to a flat list of cell strings"""
+    return [row[0] if row else '' for row in value_range.get('values', [])]
+
+
+def count_from_columns(header_row, first_column, sent_column=None):
+    """Metrics from the header, first column and Sent column only
+
+    A row counts toward the length when its first cell or its Sent cell is
+    non-empty (the full-grid reader counts rows with any non-empty cell).
+    """
+    sent_column = sent_column or []
+    non_empty = np.zeros(max(len(first_column), len(sent_column)), dtype=bool)
+    non_empty[:len(first_column)] |= np.array(first_column, dtype=object) != ''
+    non_empty[:len(sent_column)] |= np.array(sent_column, dtype=object) != ''
+    return _metrics_from(np.count_nonzero(non_empty), sent_column[1:])
+
+
+def _batch_values_get(service, requests):
+    """Run many values.batchGet calls in one HTTP batch; returns {request_id: (valueRanges, error)}
+
+    Every request inside the batch counts against the Sheets quota, so the
+    scheduler is charged per request. Requests that come back 429/5xx are
+    re-sent together in a smaller batch after a backoff.
+    """
+    scheduler = get_google_scheduler()
+    results = {}
+    pending = dict(requests)
+
+    def callback(request_id, response, exception):
+        results[request_id] = ((response or {}).get('valueRanges', []), exception)
+
+    for attempt in range(MAX_RETRIES + 1):
+        scheduler.throttle("sheets", len(pending))
+        batch = service.new_batch_http_request(callback=callback)
+        for request_id, (sheet_id, ranges) in pending.items():
+            batch.add(
+                service.spreadsheets().values().batchGet(
+                    spreadsheetId=sheet_id, ranges=ranges, majorDimension='ROWS'
+                ),
+                request_id=request_id
+            )
+        try:
+            batch.execute()
+        except Exception as e:
+            if attempt < MAX_RETRIES and is_retryable(e):
+                scheduler.backoff(attempt)
+                continue
+            # The whole HTTP batch failed; report it against every request so callers fall back
+            results.update({request_id: ([], e) for request_id in pending})
+            return results
+
+        pending = {
+            request_id: pending[request_id] for request_id in pending
+            if results.get(request_id, ([], None))[1] is not None and is_retryable(results[request_id][1])
+        }
+        if not pending or attempt == MAX_RETRIES:
+            return results
+        scheduler.backoff(attempt)
+    return results
+
+
+def fetch_group_metrics(creds, group):
+    """Column-targeted metrics for a group of (key, name, sheet_id)
+
+    Returns a list of (key, name, metrics, has_content, error). Sheets whose
+    targeted read fails fall back to a full-grid read before being reported.
+    """
+    gc, _ = _get_clients(creds)
+    service = gc.sheet.service
+    by_id = {str(i): item for i, item in enumerate(group)}
+
+    # Round 1: header row + first column for every sheet in the group
+    first_pass = _batch_values_get(service, {
+        request_id: (sheet_id, ['1:1', 'A:A']) for request_id, (_, _, sheet_id) in by_id.items()
+    })
+
+    results = []
+    fallback = []
+    sent_requests = {}
+    parsed = {}
+    for request_id, (key, name, sheet_id) in by_id.items():
+        value_ranges, error = first_pass.get(request_id, ([], None))
+        if error is not None or len(value_ranges) < 2:
+            fallback.append((key, name, sheet_id))
+            continue
+        header_rows = value_ranges[0].get('values', [])
+        header_row = header_rows[0] if header_rows else []
+        first_column = _flatten_column(value_ranges[1])
+        parsed[request_id] = (header_row, first_column)
+        if "Sent" in header_row:
+            letter = column_letter(header_row.index("Sent"))
+            sent_requests[request_id] = (sheet_id, [f'{letter}:{letter}'])
+
+    # Round 2: just the Sent column, for sheets that have one
+    second_pass = _batch_values_get(service, sent_requests) if sent_requests else {}
+
+    for request_id, (header_row, first_column) in parsed.items():
+        key, name, sheet_id = by_id[request_id]
+        sent_column = None
+        if request_id in sent_requests:
+            value_ranges, error = second_pass.get(request_id, ([], None))
+            if error is not None or not value_ranges:
+                fallback.append((key, name, sheet_id))
+                continue
+            sent_column = _flatten_column(value_ranges[0])
+        has_content = bool(header_row) or any(first_column)
+        results.append((key, name, count_from_columns(header_row, first_column, sent_column), has_content, None))
+
+    for key, name, sheet_id in fallback:
+        try:
+            metrics, has_content = fetch_sheet_metrics(creds, sheet_id)
+            results.append((key, name, metrics, has_content, None))
+        except Exception as e:
+            results.append((key, name, None, False, e))
+
+    return results
+
+
+def _fetch_single(creds, item):
+    """Full-grid metrics for one (key, name, sheet_id), in fetch_group_metrics' result shape"""
+    key, name, sheet_id = item
+    try:
+        metrics, has_content = fetch_sheet_metrics(creds, sheet_id)
+        return [(key, name, metrics, has_content, None)]
+    except Exception as e:
+        return [(key, name, None, False, e)]
+
+
+class SheetMetricsCache:
+    """Persistent (SQLite) sheet metrics keyed by Drive file id + modifiedTime"""
+
+    def __init__(self, path=SHEET_CACHE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sheet_metrics (
+                file_id TEXT NOT NULL,
+                reader TEXT NOT NULL,
+                modified_time TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                depleted INTEGER NOT NULL,
+                rejected INTEGER NOT NULL,
+                has_content INTEGER NOT NULL,
+                cached_at REAL NOT NULL,
+                statuses TEXT,
+                PRIMARY KEY (file_id, reader)
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sheet_metrics)")}
+        if 'statuses' not in columns:
+            # Caches written before status histograms; those rows are re-read once
+            self._conn.execute("ALTER TABLE sheet_metrics ADD COLUMN statuses TEXT")
+        self._conn.commit()
+
+    def get_many(self, files, reader):
+        """{file_id: (metrics, has_content)} for files whose modifiedTime still matches
+
+        files is a list of (file_id, modified_time).
+        """
+        wanted = {file_id: modified_time for file_id, modified_time in files if file_id and modified_time}
+        hits = {}
+        with self._lock:
+            ids = list(wanted)
+            # SQLite caps bound parameters per statement, so look up in chunks
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT file_id, modified_time, length, depleted, rejected, has_content, statuses "
+                    f"FROM sheet_metrics WHERE reader = ? AND file_id IN ({', '.join('?' * len(chunk))})",
+                    [reader, *chunk]
+                ).fetchall()
+                for file_id, modified_time, length, depleted, rejected, has_content, statuses in rows:
+                    if wanted[file_id] == modified_time and statuses is not None:
+                        hits[file_id] = (
+                            {'length': length, 'depleted': depleted, 'rejected': rejected,
+                             'statuses': json.loads(statuses)},
+                            bool(has_content)
+                        )
+        return hits
+
+    def put_many(self, entries, reader):
+        """Store [(file_id, modified_time, metrics, has_content)]"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sheet_metrics "
+                "(file_id, reader, modified_time, length, depleted, rejected, has_content, cached_at, statuses) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (file_id, reader, modified_time, metrics['length'], metrics['depleted'],
+                     metrics['rejected'], int(has_content), now, json.dumps(metrics['statuses']))
+                    for file_id, modified_time, metrics, has_content in entries
+                    if file_id and modified_time
+                ]
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM sheet_metrics")
+            self._conn.commit()
+
+
+@st.cache_resource
+def get_sheet_metrics_cache():
+    """Process-wide handle on the persistent sheet metrics cache"""
+    return SheetMetricsCache()
+
+
+def scan_sheets(creds, sheets, max_workers=DEFAULT_MAX_WORKERS, progress_callback=None,
+                reader=COLUMN_READER, cache=None):
+    """Fetch metrics for many sheets concurrently
+
+    sheets is a list of (key, name, sheet_id, modified_time). With a cache, sheets
+    whose Drive modifiedTime is unchanged are answered from it and only the rest
+    are read. With the column reader, sheets are read in batched groups; with the
+    full-grid reader, one at a time per worker. progress_callback(done, total, name)
+    is called from the calling thread as work finishes, so it may update Streamlit
+    widgets. Returns (metrics by key, failed file messages, successful count,
+    cached count). Failed and empty sheets get zero metrics; empty sheets don't
+    count as successful.
+    """
+    metrics = {}
+    failed_files = []
+    successful_processed = 0
+    done = 0
+
+    cached = {}
+    if cache is not None:
+        cached = cache.get_many([(sheet_id, modified_time) for _, _, sheet_id, modified_time in sheets], reader)
+    to_fetch = []
+    for key, name, sheet_id, modified_time in sheets:
+        if sheet_id in cached:
+            metrics[key], has_content = cached[sheet_id]
+            successful_processed += int(has_content)
+            done += 1
+        else:
+            to_fetch.append((key, name, sheet_id))
+    if done and progress_callback:
+        progress_callback(done, len(sheets), "cached sheets")
+
+    modified_times = {key: (sheet_id, modified_time) for key, _, sheet_id, modified_time in sheets}
+    fresh = []
+
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as executor:
+        if reader == COLUMN_READER:
+            futures = [
+                executor.submit(fetch_group_metrics, creds, to_fetch[start:start + BATCH_GROUP_SIZE])
+                for start in range(0, len(to_fetch), BATCH_GROUP_SIZE)
+            ]
+        else:
+            futures = [executor.submit(_fetch_single, creds, item) for item in to_fetch]
+
+        for future in as_completed(futures):
+            for key, name, sheet_metrics, has_content, error in future.result():
+                if error is not None:
+                    failed_files.append(f"{name}: {str(error)}")
+                    sheet_metrics = empty_metrics()
+                else:
+                    successful_processed += int(has_content)
+                    fresh.append((*modified_times[key], sheet_metrics, has_content))
+                metrics[key] = sheet_metrics
+                done += 1
+
+            if progress_callback:
+                progress_callback(done, len(sheets), name)
+
+    if cache is not None and fresh:
+        cache.put_many(fresh, reader)
+
+    return metrics, failed_files, successful_processed, len(cached)